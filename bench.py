@@ -0,0 +1,331 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+# =============================
+# Microbenchmarks for every hot path
+# =============================
+# Runs on a plain Linux box: synthetic frames, simulated I2C (sim_servo.py) and the
+# bundled tomato_model_pi.tflite. A benchmark whose dependencies are missing is skipped,
+# which fails the run if the baseline has it; a gate that cannot run fails too.
+#
+#   python bench.py              compare against bench_baseline.json and check the gates,
+#                                exit 1 on a regression or a failed gate
+#   python bench.py --update     store the current numbers as the new baseline
+#   python bench.py -k hsv       only benchmarks whose name contains "hsv"
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+TOLERANCE = 0.25          # allowed slowdown before a benchmark counts as regressed
+SAMPLES = 15
+MIN_SAMPLE_TIME = 0.05    # seconds; the loop count per sample is scaled up to reach this
+
+BENCHMARKS = {}
+GATES = {}
+
+
+def bench(name):
+    """Registers setup(): it returns the zero-argument callable to be timed."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def gate(name):
+    """Registers check(): it returns [(label, measured, limit)]; measured > limit fails.
+
+    Gates are absolute budgets, not baseline comparisons, and run with the benchmarks.
+    """
+    def register(check):
+        GATES[name] = check
+        return check
+    return register
+
+
+# ---------- vision ----------
+def _frame():
+    from frame_arena import synthetic_frame
+    return synthetic_frame(640, 480)
+
+
+@bench("hsv_mask_naive")
+def _hsv_mask_naive():
+    from frame_arena import segment_naive
+    frame = _frame()
+    return lambda: segment_naive(frame)
+
+
+@bench("hsv_mask_arena")
+def _hsv_mask_arena():
+    from frame_arena import FrameProcessor
+    frame = _frame()
+    processor = FrameProcessor()
+    return lambda: processor.segment(frame)
+
+
+@bench("ripeness_stages")
+def _ripeness_stages():
+    from ripeness_stages import RipenessClassifier, staged_frame
+    frame = staged_frame()
+    classifier = RipenessClassifier()
+    return lambda: classifier.fruits(frame)
+
+
+@bench("contour_filter")
+def _contour_filter():
+    import cv2
+
+    from frame_arena import MIN_AREA, FrameProcessor
+    mask = FrameProcessor().segment(_frame()).copy()
+
+    def run():
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) >= MIN_AREA]
+    return run
+
+
+@bench("crop_preprocess_naive")
+def _crop_preprocess_naive():
+    from frame_arena import preprocess_naive
+    crop = _frame()[180:300, 100:220]
+    return lambda: preprocess_naive(crop)
+
+
+@bench("crop_preprocess_arena")
+def _crop_preprocess_arena():
+    from frame_arena import FrameProcessor
+    crop = _frame()[180:300, 100:220]
+    processor = FrameProcessor()
+    return lambda: processor.preprocess(crop)
+
+
+@bench("tile_fruit_select")
+def _tile_fruit_select():
+    from tile_heatmap import TileHeatmap
+    frame = _frame()
+    tiler = TileHeatmap(classifier=None)
+    tiler._ensure(frame)
+    return lambda: tiler.select(frame)
+
+
+@bench("tflite_invoke")
+def _tflite_invoke():
+    import numpy as np
+
+    from interpreter_pool import MODEL_PATH, load_interpreter
+    interpreter = load_interpreter(os.path.join(os.path.dirname(BASELINE_PATH), MODEL_PATH))
+    inp = interpreter.get_input_details()[0]
+    interpreter.set_tensor(inp["index"], np.zeros(inp["shape"], inp["dtype"]))
+    return interpreter.invoke
+
+
+# ---------- servos ----------
+@bench("angle_to_duty")
+def _angle_to_duty():
+    from servo_duty import angle_to_duty
+    return lambda: [angle_to_duty(a) for a in range(181)]
+
+
+@bench("set_servo_angle")
+def _set_servo_angle():
+    # movement_test.py mapping written through JointState, as every motion path is
+    from joint_state import JointState
+    from servo_duty import DutyServo, safe_angle_to_duty
+    from sim_servo import SimPCA9685
+    pca = SimPCA9685()
+    joints = JointState({0: DutyServo(pca.channels[0], safe_angle_to_duty)}, path=None)
+    return lambda: [joints.command(0, a) for a in range(181)]
+
+
+@bench("move_slow_steps")
+def _move_slow_steps():
+    # JointState.move_slow as detect_pick.py runs it, simulated servo and clock
+    from joint_state import JointState
+    from sim_servo import SimClock, make_servos
+    _, servos = make_servos([0])
+    joints = JointState(servos, path=None, clock=SimClock())
+    joints.move_slow(0, 45)
+
+    def run():
+        joints.move_slow(0, 135)
+        joints.move_slow(0, 45)
+    return run
+
+
+# ---------- planning ----------
+@bench("pick_order_8")
+def _pick_order():
+    import random
+
+    from pick_scheduler import BASE_CH, DROP_POSE, make_target, order_targets
+    rng = random.Random(0)
+    targets = [make_target((rng.randint(0, 560), rng.randint(0, 400), 60, 60), 0.9, (480, 640),
+                           calibrated=True)
+               for _ in range(8)]
+    # Trough drop (base stays put): the only case where order needs the full search
+    trough = dict(DROP_POSE)
+    trough[BASE_CH] = None
+    return lambda: order_targets(targets, drop_pose=trough)
+
+
+@bench("motion_retime")
+def _motion_retime():
+    from motion_recorder import _demo_teach, prune, retime
+    poses = [pose for _, pose in _demo_teach().waypoints]
+    return lambda: retime(prune(poses))
+
+
+# ---------- gates ----------
+@gate("arena_alloc")
+def _arena_alloc():
+    from frame_arena import check_allocations
+    return check_allocations()
+
+
+@gate("dataset_capture")
+def _dataset_capture():
+    from dataset_capture import check_capture
+    return check_capture()
+
+
+# =============================
+# Runner
+# =============================
+def measure(fn):
+    """Best seconds per call over SAMPLES samples (least disturbed by other load)."""
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_SAMPLE_TIME or number >= 1 << 20:
+            break
+        number *= 2
+    samples = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return min(samples)
+
+
+def run(selected=None):
+    results, skipped = {}, {}
+    for name, setup in BENCHMARKS.items():
+        if selected and selected not in name:
+            continue
+        try:
+            fn = setup()
+        except (ImportError, OSError, ValueError) as e:
+            skipped[name] = str(e)
+            continue
+        results[name] = measure(fn)
+    return results, skipped
+
+
+def run_gates(selected=None):
+    """Prints every gate check; returns the names of failed gates.
+
+    A gate that cannot run (missing dependency, error) counts as failed.
+    """
+    failed = []
+    for name, check in GATES.items():
+        if selected and selected not in name:
+            continue
+        try:
+            rows = check()
+        except Exception as e:
+            failed.append(name)
+            print(f"gate {name}: could not run: {e}")
+            continue
+        for label, measured, limit in rows:
+            ok = measured <= limit
+            if not ok and name not in failed:
+                failed.append(name)
+            print(f"gate {name}: {label} {measured} (limit {limit}){'' if ok else '  FAILED'}")
+    return failed
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path) or {"benchmarks": {}}
+    baseline["machine"] = f"{platform.node()} {platform.machine()} python {platform.python_version()}"
+    baseline["benchmarks"].update({name: round(sec * 1e6, 3) for name, sec in results.items()})
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results, baseline, tolerance=TOLERANCE, selected=None):
+    """Prints a report; returns the names of regressed benchmarks.
+
+    A baseline entry with no result (skipped or failed to set up) counts as regressed,
+    so a broken benchmark cannot pass silently.
+    """
+    regressed = []
+    stored = baseline["benchmarks"] if baseline else {}
+    print(f"{'benchmark':24s} {'us/call':>12s} {'baseline':>12s} {'change':>8s}")
+    for name, sec in results.items():
+        us = sec * 1e6
+        if name not in stored:
+            print(f"{name:24s} {us:12.2f} {'-':>12s} {'new':>8s}")
+            continue
+        change = us / stored[name] - 1.0
+        flag = ""
+        if change > tolerance:
+            regressed.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:24s} {us:12.2f} {stored[name]:12.2f} {change:+7.0%}{flag}")
+    for name in stored:
+        if name not in results and (not selected or selected in name):
+            regressed.append(name)
+            print(f"{name:24s} {'-':>12s} {stored[name]:12.2f} {'':>8s}  MISSING")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks")
+    parser.add_argument("--update", action="store_true", help="store results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("-k", dest="selected", help="only run benchmarks containing this")
+    args = parser.parse_args(argv)
+
+    results, skipped = run(args.selected)
+    for name, reason in skipped.items():
+        print(f"skipped {name}: {reason}")
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get("machine"):
+        print(f"baseline from: {baseline['machine']}")
+    regressed = compare(results, baseline, args.tolerance, args.selected)
+    failed_gates = run_gates(args.selected)
+    if failed_gates:
+        print(f"❌ {len(failed_gates)} gate(s) failed: {', '.join(failed_gates)}")
+
+    if args.update or baseline is None:
+        save_baseline(results, args.baseline)
+        print(f"baseline written to {args.baseline}")
+        return 1 if failed_gates else 0
+    if regressed:
+        print(f"❌ {len(regressed)} benchmark(s) missing or slower than baseline by more "
+              f"than {args.tolerance:.0%}: {', '.join(regressed)}")
+        return 1
+    if failed_gates:
+        return 1
+    print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# =============================
+# Capture defaults
+# =============================
+DEFAULT_WIDTH = 640
+DEFAULT_HEIGHT = 480
+DEFAULT_FPS = 30
+DEFAULT_FOURCC = "MJPG"   # MJPEG keeps USB bandwidth low at 30 fps
+RING_SIZE = 3             # latest + held by consumer + one being written
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+# =============================
+# Frame sources
+# =============================
+class V4L2Source:
+    """Live camera opened through V4L2 with negotiated format and minimal buffering."""
+
+    def __init__(self, device=0, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT,
+                 fps=DEFAULT_FPS, fourcc=DEFAULT_FOURCC):
+        self.device = device
+        self.width, self.height, self.fps = width, height, fps
+        self.fourcc = fourcc
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.device, cv2.CAP_V4L2)
+        if not self.cap.isOpened():
+            return False
+        # FOURCC must be set before the resolution or some drivers ignore it
+        if self.fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Read back what the driver actually agreed to
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or self.fps
+        print(f"✅ Camera {self.device}: {self.width}x{self.height} @ {self.fps:.0f} fps")
+        return True
+
+    def read(self, dst=None):
+        return self.cap.read(dst)
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class VideoFileSource:
+    """Recorded video, optionally paced to its native frame rate and looped."""
+
+    def __init__(self, path, realtime=True, loop=True):
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self.cap = None
+        self.fps = DEFAULT_FPS
+        self._next_due = 0.0
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+        self._next_due = time.monotonic()
+        return True
+
+    def read(self, dst=None):
+        if self.realtime:
+            delay = self._next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_due = max(self._next_due, time.monotonic()) + 1.0 / self.fps
+        ret, frame = self.cap.read(dst)
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(dst)
+        return ret, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class ImageDirSource:
+    """Still images from a directory, served in name order at a fixed rate."""
+
+    def __init__(self, path, fps=DEFAULT_FPS, loop=True):
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.files = []
+        self.index = 0
+        self._next_due = 0.0
+
+    def open(self):
+        self.files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self._next_due = time.monotonic()
+        return len(self.files) > 0
+
+    def read(self, dst=None):
+        if self.index >= len(self.files):
+            if not self.loop:
+                return False, None
+            self.index = 0
+        delay = self._next_due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_due = max(self._next_due, time.monotonic()) + 1.0 / self.fps
+
+        img = cv2.imread(self.files[self.index])
+        self.index += 1
+        if img is None:
+            return False, None
+        if dst is not None and dst.shape == img.shape:
+            np.copyto(dst, img)
+            return True, dst
+        return True, img
+
+    def release(self):
+        self.files = []
+
+
+class SyntheticSource:
+    """Generated scene with moving red and green blobs, for benches without a camera."""
+
+    def __init__(self, width=DEFAULT_WIDTH, height=DEFAULT_HEIGHT, fps=DEFAULT_FPS,
+                 num_fruits=3, realtime=True, seed=0):
+        self.width, self.height, self.fps = width, height, fps
+        self.num_fruits = num_fruits
+        self.realtime = realtime
+        self.rng = np.random.default_rng(seed)
+        self.tick = 0
+        self._next_due = 0.0
+        self._background = None
+        self._fruits = []
+
+    def open(self):
+        self._background = np.full((self.height, self.width, 3), (40, 90, 40), np.uint8)
+        radius = max(10, min(self.width, self.height) // 12)
+        for i in range(self.num_fruits):
+            color = (30, 30, 200) if i % 3 != 2 else (40, 180, 60)   # BGR red / green
+            cx = int(self.rng.integers(radius, self.width - radius))
+            cy = int(self.rng.integers(radius, self.height - radius))
+            self._fruits.append((cx, cy, radius, color))
+        self._next_due = time.monotonic()
+        return True
+
+    def read(self, dst=None):
+        if self.realtime:
+            delay = self._next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_due = max(self._next_due, time.monotonic()) + 1.0 / self.fps
+        if dst is None or dst.shape != self._background.shape:
+            dst = np.empty_like(self._background)
+        np.copyto(dst, self._background)
+        drift = int(10 * np.sin(self.tick / 15.0))
+        for cx, cy, radius, color in self._fruits:
+            cv2.circle(dst, (cx + drift, cy), radius, color, -1)
+        self.tick += 1
+        return True, dst
+
+    def release(self):
+        self._fruits = []
+
+
+def make_source(spec, **kwargs):
+    """Builds a source from an int/device path, video file, image directory or 'synthetic'."""
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return V4L2Source(int(spec), **kwargs)
+    if spec == "synthetic":
+        return SyntheticSource(**kwargs)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, **kwargs)
+    if spec.startswith("/dev/video"):
+        return V4L2Source(spec, **kwargs)
+    return VideoFileSource(spec, **kwargs)
+
+
+# =============================
+# Frame-age metric
+# =============================
+class LatencyStats:
+    """Rolling statistics of frame age (capture timestamp to decision), in seconds."""
+
+    def __init__(self, window=300):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, age):
+        self.samples.append(age)
+        self.count += 1
+        self.max = max(self.max, age)
+
+    def mean(self):
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+    def summary(self):
+        return (f"frame age: mean {self.mean() * 1000:.1f} ms, "
+                f"p95 {self.percentile(95) * 1000:.1f} ms, max {self.max * 1000:.1f} ms "
+                f"({self.count} frames)")
+
+
+# =============================
+# Latest-frame grabber
+# =============================
+class LatestFrameGrabber:
+    """Reads the source on a background thread and only ever exposes the newest frame.
+
+    Frames are decoded into a small ring of reusable buffers. The consumer holds one
+    slot until its next read(), the grabber never writes into the held or latest slot,
+    so a frame handed out stays valid without copying.
+    """
+
+    def __init__(self, source, ring_size=RING_SIZE):
+        if ring_size < 3:
+            raise ValueError("ring_size must be at least 3")
+        self.source = source
+        self.ring = [None] * ring_size
+        self.stamps = [0.0] * ring_size
+        self.seqs = [0] * ring_size
+        self.latest = -1
+        self.held = -1
+        self.seq = 0
+        self.dropped = 0
+        self.timestamp = None
+        self.last_seq = 0
+        self.stats = LatencyStats()
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if not self.source.open():
+            return False
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def _free_slot(self):
+        for offset in range(1, len(self.ring) + 1):
+            slot = (self.latest + offset) % len(self.ring)
+            if slot != self.latest and slot != self.held:
+                return slot
+
+    def _grab_loop(self):
+        while self._running:
+            with self._cond:
+                slot = self._free_slot()
+            ret, frame = self.source.read(self.ring[slot])
+            stamp = time.monotonic()
+            if not ret:
+                with self._cond:
+                    self._running = False
+                    self._cond.notify_all()
+                break
+            with self._cond:
+                # Resolution change (or first frame): keep the buffer the source returned
+                self.ring[slot] = frame
+                self.seq += 1
+                if self.latest >= 0 and self.seqs[self.latest] > self.last_seq:
+                    self.dropped += 1
+                self.stamps[slot] = stamp
+                self.seqs[slot] = self.seq
+                self.latest = slot
+                self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """Returns (ret, frame) like VideoCapture.read, waiting for a frame newer than the last."""
+        with self._cond:
+            if not self._cond.wait_for(
+                    lambda: not self._running or (self.latest >= 0 and self.seqs[self.latest] > self.last_seq),
+                    timeout):
+                return False, None
+            if self.latest < 0 or self.seqs[self.latest] <= self.last_seq:
+                return False, None
+            self.held = self.latest
+            self.last_seq = self.seqs[self.held]
+            self.timestamp = self.stamps[self.held]
+            return True, self.ring[self.held]
+
+    def frame_age(self):
+        """Seconds since the frame last returned by read() left the driver."""
+        if self.timestamp is None:
+            return 0.0
+        return time.monotonic() - self.timestamp
+
+    def mark_decision(self):
+        """Records the glass-to-decision latency of the current frame."""
+        age = self.frame_age()
+        self.stats.record(age)
+        return age
+
+    def isOpened(self):
+        return self._running
+
+    def release(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.source.release()
+
+
+def open_capture(spec=0, **kwargs):
+    """Drop-in replacement for cv2.VideoCapture(spec) that always serves the newest frame.
+
+    spec "bus" (or "bus:<name>") reads from a frame_bus.py publisher instead of opening
+    the camera, so several scripts can share it.
+    """
+    if isinstance(spec, str) and (spec == "bus" or spec.startswith("bus:")):
+        from frame_bus import BUS_NAME, FrameBusSubscriber
+        return FrameBusSubscriber(spec[4:] or BUS_NAME, **kwargs)
+    grabber = LatestFrameGrabber(make_source(spec, **kwargs))
+    if not grabber.start():
+        print(f"❌ Could not open capture source {spec!r}")
+    return grabber
+
+
+# =============================
+# Frame-age check
+# =============================
+if __name__ == "__main__":
+    import sys
+
+    spec = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    cap = open_capture(spec)
+    start = time.monotonic()
+    frames = 0
+    try:
+        while time.monotonic() - start < 5.0:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            time.sleep(0.05)   # pretend to do 50 ms of work per frame
+            cap.mark_decision()
+            frames += 1
+    finally:
+        cap.release()
+    print(f"Processed {frames} frames, dropped {cap.dropped} stale frames")
+    print(cap.stats.summary())
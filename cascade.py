@@ -0,0 +1,161 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from interpreter_pool import MODEL_PATH, InterpreterPool
+
+# =============================
+# Cascade defaults
+# =============================
+# tomato_model_small.tflite comes from convert.py --small (dynamic-range quantized)
+FAST_MODEL_PATH = "tomato_model_small.tflite"
+# Escalation band measured by `python cascade.py IMAGE_DIR`; without it there is no
+# cascade, since an unmeasured band has unknown agreement with the full model
+BAND_PATH = "cascade_band.json"
+CANDIDATE_BANDS = ((0.0, 0.80), (0.0, 0.90), (0.0, 0.95), (0.0, 0.98), (0.5, 0.90))
+MIN_AGREEMENT = 0.99          # top-1 agreement with the full model a band must reach
+
+
+def confidence(prediction):
+    """Top-1 probability; for a multi-head prediction, of its disease head."""
+    if isinstance(prediction, dict):
+        prediction = prediction["disease"]
+    return float(np.max(prediction))
+
+
+class CascadeClassifier:
+    """Fast model first, full model only for crops the fast model is unsure about.
+
+    A crop whose fast-model confidence falls inside band is re-classified by the full
+    model and that answer is used. Every crop passed in is classified: per-fruit reuse
+    across frames belongs to the caller's tracker (temporal_vote.py), which knows which
+    fruit is which; ripeness&disease.py only passes new and expired fruits.
+    Same classify()/close() shape as InterpreterPool.
+    """
+
+    def __init__(self, fast, full, band):
+        self.fast = fast
+        self.full = full
+        self.band = band
+        self.crops = 0
+        self.escalated = 0
+
+    def classify(self, crops):
+        """Predictions for crops, in input order."""
+        self.crops += len(crops)
+        results = list(self.fast.classify(crops))
+        low, high = self.band
+        unsure = [i for i, prediction in enumerate(results)
+                  if low <= confidence(prediction) < high]
+        if unsure:
+            self.escalated += len(unsure)
+            for i, prediction in zip(unsure, self.full.classify([crops[i] for i in unsure])):
+                results[i] = prediction
+        return results
+
+    @property
+    def escalation_rate(self):
+        return self.escalated / self.crops if self.crops else 0.0
+
+    def close(self):
+        self.fast.close()
+        self.full.close()
+
+
+# =============================
+# Escalation rate, latency and agreement on a local image set
+# =============================
+def _load_images(image_dir):
+    import cv2
+
+    from capture import IMAGE_EXTENSIONS
+    images = []
+    for root, _, names in os.walk(image_dir):
+        for name in sorted(names):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                img = cv2.imread(os.path.join(root, name))
+                if img is not None:
+                    images.append(img)
+    return images
+
+
+def evaluate(image_dir, fast_path=FAST_MODEL_PATH, full_path=MODEL_PATH,
+             bands=CANDIDATE_BANDS):
+    """Per band: escalation rate, ms/crop and top-1 agreement with the full model.
+
+    Every image is one crop. Rows are (name, band, ms, escalation rate, agreement);
+    band is None for the full model alone.
+    """
+    images = _load_images(image_dir)
+    if not images:
+        raise ValueError(f"no images in {image_dir}")
+    fast = InterpreterPool(fast_path, size=1, num_threads=4)
+    full = InterpreterPool(full_path, size=1, num_threads=4)
+    try:
+        full.classify(images[:1])
+        start = time.perf_counter()
+        reference = [int(np.argmax(full.classify([img])[0])) for img in images]
+        full_ms = 1000 * (time.perf_counter() - start) / len(images)
+
+        rows = [("full only", None, full_ms, 1.0, 1.0)]
+        for band in bands:
+            cascade = CascadeClassifier(fast, full, band)
+            cascade.classify(images[:1])
+            cascade.crops = cascade.escalated = 0
+            start = time.perf_counter()
+            answers = [int(np.argmax(cascade.classify([img])[0])) for img in images]
+            ms = 1000 * (time.perf_counter() - start) / len(images)
+            agreement = sum(a == r for a, r in zip(answers, reference)) / len(images)
+            rows.append((f"band {band[0]:.2f}-{band[1]:.2f}", band, ms,
+                         cascade.escalation_rate, agreement))
+    finally:
+        fast.close()
+        full.close()
+    return len(images), rows
+
+
+def choose_band(rows, min_agreement=MIN_AGREEMENT):
+    """Fastest measured band that agrees with the full model on min_agreement of the
+    crops and is faster than the full model alone; None if no band qualifies."""
+    full_ms = rows[0][2]
+    ok = [row for row in rows[1:] if row[4] >= min_agreement and row[2] < full_ms]
+    return min(ok, key=lambda row: row[2]) if ok else None
+
+
+def save_band(row, images, path=BAND_PATH):
+    _, band, ms, rate, agreement = row
+    with open(path, "w") as f:
+        json.dump({"band": list(band), "ms_per_crop": ms, "escalation_rate": rate,
+                   "agreement": agreement, "images": images}, f, indent=2)
+
+
+def load_band(path=BAND_PATH):
+    """The measured band as (low, high), or None when the cascade was never measured."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return tuple(json.load(f)["band"])
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python cascade.py IMAGE_DIR   (e.g. a dataset_capture.py folder)
+    if len(sys.argv) < 2:
+        sys.exit("usage: python cascade.py IMAGE_DIR")
+    count, rows = evaluate(sys.argv[1])
+    print(f"{count} images, fast {FAST_MODEL_PATH} / full {MODEL_PATH}")
+    print("config            ms/crop  escalated  agreement")
+    for name, _, ms, rate, agreement in rows:
+        print(f"{name:16s}  {ms:7.2f}  {rate * 100:8.1f}%  {agreement * 100:8.1f}%")
+    best = choose_band(rows)
+    if best is None:
+        if os.path.exists(BAND_PATH):
+            os.remove(BAND_PATH)
+        print(f"❌ No band reaches {MIN_AGREEMENT:.0%} agreement faster than the full model; "
+              f"cascade disabled")
+    else:
+        save_band(best, count)
+        print(f"✅ {best[0]} saved to {BAND_PATH}")
@@ -6,6 +6,8 @@ import numpy as np
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
 from tflite_runtime.interpreter import Interpreter
+from capture import open_capture
+from joint_state import JointState
 
 # ==========================================
 # 1. ARM INITIALIZATION (Added to your script)
@@ -30,16 +32,11 @@ LIMITS = {
     GRIPPER_CH:  {"open": 170,    "close": 20}
 }
 
+# Commanded angles live here (and in joint_state.json), never read back over I2C
+joints = JointState(servos)
+
 def move_slow(channel_id, target_angle, speed=0.04):
-    current = servos[channel_id].angle
-    if current is None: current = 90
-    start_angle, target_angle = int(current), int(target_angle)
-    target_angle = max(0, min(180, target_angle))
-    if start_angle == target_angle: return
-    step = 1 if target_angle > start_angle else -1
-    for angle in range(start_angle, target_angle + step, step):
-        servos[channel_id].angle = angle
-        time.sleep(speed)
+    joints.move_slow(channel_id, target_angle, speed)
 
 def go_home():
     move_slow(GRIPPER_CH, LIMITS[GRIPPER_CH]["open"])
@@ -55,7 +52,7 @@ def pick_and_drop():
     move_slow(ELBOW_CH, LIMITS[ELBOW_CH]["pick"])
     move_slow(GRIPPER_CH, LIMITS[GRIPPER_CH]["close"], speed=0.02)
     time.sleep(1)
-    servos[GRIPPER_CH].angle = None # Relax gripper
+    joints.relax(GRIPPER_CH) # Relax gripper
     # Return to neutral and release
     move_slow(ELBOW_CH, LIMITS[ELBOW_CH]["neutral"])
     move_slow(SHOULDER_CH, LIMITS[SHOULDER_CH]["neutral"])
@@ -86,7 +83,9 @@ input_details = interpreter.get_input_details()
 output_details = interpreter.get_output_details()
 HEALTHY_CLASS_INDEX = 1
 
-cap = cv2.VideoCapture(0)
+# Background grabber: always hands out the newest frame, never one queued up during a pick
+CAMERA_SOURCE = 0
+cap = open_capture(CAMERA_SOURCE)
 go_home()
 
 # ... (Keep your previous imports and initializations) ...
@@ -155,6 +154,8 @@ try:
                                 cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
                     cv2.imshow("Harvest Vision", frame)
                     cv2.waitKey(1)
+                    age = cap.mark_decision()
+                    print(f"🎯 Target locked (frame age {age * 1000:.0f} ms)")
                     pick_and_drop()
                     break
                 else:
@@ -173,6 +174,7 @@ try:
         if cv2.waitKey(1) & 0xFF == ord('q'): break
 
 finally:
+    print(cap.stats.summary())
     cap.release()
     cv2.destroyAllWindows()
     pca.deinit()
@@ -1,17 +1,82 @@
+import argparse
+
 import tensorflow as tf
 
-# Load the model
-model = tf.keras.models.load_model('tomatofinal.h5')
+# Ripeness stages of the fused model's ripeness head, same order as ripeness_stages.STAGES
+RIPENESS_STAGES = ["Green", "Breaker", "Turning", "Pink", "Light red", "Red"]
+IMAGE_SIZE = (224, 224)
+
+
+def convert(model, path, quantize=False):
+    """Writes model as a TFLite flatbuffer using standard builtin ops only.
+
+    quantize stores the weights as int8 (dynamic-range quantization): a smaller,
+    faster model for the first tier of cascade.py.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    # This ensures it uses standard, compatible operations
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    tflite_model = converter.convert()
+    with open(path, 'wb') as f:
+        f.write(tflite_model)
+    print(f"{path} created successfully! ({len(tflite_model) / 1024:.0f} KiB)")
+
+
+# =============================
+# Multi-head export: shared backbone, ripeness head + disease head
+# =============================
+def build_multi_head(model, num_stages=len(RIPENESS_STAGES)):
+    """(fused, ripeness_only) models sharing the disease model's backbone.
+
+    The backbone is everything up to the disease model's last layer, which stays the
+    disease head unchanged. The new ripeness head is a softmax on the same features.
+    """
+    features = model.layers[-2].output
+    ripeness = tf.keras.layers.Dense(num_stages, activation='softmax', name='ripeness')(features)
+    fused = tf.keras.Model(model.input, [ripeness, model.output], name='tomato_fused')
+    ripeness_only = tf.keras.Model(model.input, ripeness, name='tomato_ripeness')
+    return fused, ripeness_only
+
+
+def train_ripeness_head(model, ripeness_only, data_dir, epochs=5):
+    """Trains only the ripeness head on data_dir/<stage>/*.jpg, backbone frozen.
+
+    Freezing keeps the disease output of the fused model identical to the original.
+    Images are fed the way the runtime feeds crops: BGR, scaled to [0, 1].
+    """
+    for layer in model.layers:
+        layer.trainable = False
+    dataset = tf.keras.utils.image_dataset_from_directory(
+        data_dir, class_names=RIPENESS_STAGES, image_size=IMAGE_SIZE, batch_size=32)
+    dataset = dataset.map(lambda x, y: (x[..., ::-1] / 255.0, y))
+    ripeness_only.compile(optimizer='adam', loss='sparse_categorical_crossentropy',
+                          metrics=['accuracy'])
+    ripeness_only.fit(dataset, epochs=epochs)
 
-# Convert to TFLite
-converter = tf.lite.TFLiteConverter.from_keras_model(model)
 
-# This ensures it uses standard, compatible operations
-converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert tomatofinal.h5 to TFLite")
+    parser.add_argument("--multi-head", metavar="RIPENESS_DIR",
+                        help="also export a fused ripeness + disease model, training the "
+                             "ripeness head on RIPENESS_DIR/<stage>/ images")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--small", action="store_true",
+                        help="also export the quantized fast model used by cascade.py")
+    args = parser.parse_args()
 
-tflite_model = converter.convert()
+    # Load the model
+    model = tf.keras.models.load_model('tomatofinal.h5')
+    convert(model, 'tomato_model.tflite')
+    if args.small:
+        convert(model, 'tomato_model_small.tflite', quantize=True)
 
-# Save the new file
-with open('tomato_model.tflite', 'wb') as f:
-    f.write(tflite_model)
-print("New tomato_model.tflite created successfully!")
\ No newline at end of file
+    if args.multi_head:
+        fused, ripeness_only = build_multi_head(model)
+        train_ripeness_head(model, ripeness_only, args.multi_head, args.epochs)
+        convert(fused, 'tomato_fused.tflite')
+        # Stand-alone ripeness model, only to compare two models against the fused one
+        convert(ripeness_only, 'tomato_ripeness.tflite')
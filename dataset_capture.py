@@ -0,0 +1,227 @@
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# =============================
+# Capture settings
+# =============================
+QUEUE_SIZE = 64            # crops waiting for a worker; beyond this new crops are dropped
+WORKERS = 2
+BATCH_SIZE = 16            # crops written together, with one manifest append
+FLUSH_INTERVAL = 2.0       # seconds before a partial batch is written anyway
+JPEG_QUALITY = 90
+MAX_BYTES = 2 * 1024 ** 3  # stop writing once the dataset folder reaches this size
+UNCERTAIN_MARGIN = 0.25    # top-1 minus top-2 probability below this = uncertain
+CONFIDENT_RATE = 0.05      # share of confident predictions kept
+HASH_DISTANCE = 6          # dHash bits that may differ and still count as duplicate
+HASH_MEMORY = 512          # recent hashes compared against
+MANIFEST = "manifest.jsonl"
+
+# check_capture() limits: submit() must cost a small fraction of writing the crop
+# inline, and the workers must keep up with CHECK_RATE crops/s without losing any
+HOT_PATH_SHARE = 0.25      # submit() time / inline cv2.imwrite time
+CHECK_RATE = 200           # crops/s offered
+DRAIN_BUDGET = 0.5         # seconds close() may take to write what is still queued
+
+
+def dhash(crop):
+    """64-bit difference hash of a downscaled grey crop."""
+    grey = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(grey, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def margin(prediction):
+    # A handful of classes: sorting in Python beats np.partition's call overhead
+    values = sorted(np.ravel(prediction).tolist())
+    if len(values) < 2:
+        return values[0]
+    return values[-1] - values[-2]
+
+
+class DatasetCapture:
+    """Collects crops and predictions for retraining without stalling the vision loop.
+
+    submit() only samples, copies the crop and enqueues it; hashing, JPEG encoding and
+    disk writes happen on background workers.
+    """
+
+    def __init__(self, out_dir, workers=WORKERS, max_bytes=MAX_BYTES,
+                 confident_rate=CONFIDENT_RATE, seed=None):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.confident_rate = confident_rate
+        self.rng = random.Random(seed)
+        self.bytes_used = sum(entry.stat().st_size for entry in os.scandir(out_dir)
+                              if entry.is_file())
+        self.stats = {"submitted": 0, "sampled_out": 0, "dropped": 0, "duplicates": 0,
+                      "written": 0, "over_budget": 0}
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._hashes = deque(maxlen=HASH_MEMORY)
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._running = True
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(workers)]
+        for w in self._workers:
+            w.start()
+
+    # ---------- hot path ----------
+    def submit(self, frame, box, prediction):
+        """Queues one crop with its box and prediction. Never blocks.
+
+        Only the sampling decision and the copies the caller may overwrite happen here;
+        converting box and prediction for the manifest is left to the workers.
+        """
+        if self.rng.random() >= self.confident_rate and margin(prediction) >= UNCERTAIN_MARGIN:
+            self._count("submitted", sampled_out=1)
+            return False
+        x, y, w, h = box
+        # Copy: the frame buffer and prediction array are reused by the capture loop
+        item = (frame[y:y+h, x:x+w].copy(), box, np.array(prediction, copy=True), time.time())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count("submitted", dropped=1)
+            return False
+        self._count("submitted")
+        return True
+
+    def _count(self, key, n=1, **more):
+        # Workers update stats too; an unlocked += can lose counts between threads
+        with self._lock:
+            self.stats[key] += n
+            for other, m in more.items():
+                self.stats[other] += m
+
+    # ---------- workers ----------
+    def _is_duplicate(self, crop_hash):
+        with self._lock:
+            for seen in self._hashes:
+                if (seen ^ crop_hash).bit_count() <= HASH_DISTANCE:
+                    self.stats["duplicates"] += 1
+                    return True
+            self._hashes.append(crop_hash)
+            return False
+
+    def _next_name(self):
+        with self._lock:
+            self._counter += 1
+            return f"{int(time.time() * 1000)}_{os.getpid()}_{self._counter:06d}.jpg"
+
+    def _write_batch(self, batch):
+        size = sum(len(data) for _, data, _ in batch)
+        with self._lock:
+            if self.bytes_used + size > self.max_bytes:
+                self.stats["over_budget"] += len(batch)
+                return
+            self.bytes_used += size
+        lines = []
+        for name, data, meta in batch:
+            with open(os.path.join(self.out_dir, name), "wb") as f:
+                f.write(data)
+            lines.append(json.dumps(dict(meta, file=name)) + "\n")
+        with self._lock:
+            with open(os.path.join(self.out_dir, MANIFEST), "a") as f:
+                f.writelines(lines)
+            self.stats["written"] += len(batch)
+
+    def _work(self):
+        batch = []
+        last_flush = time.monotonic()
+        while self._running or not self._queue.empty():
+            try:
+                crop, box, prediction, stamp = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                crop = None
+            if crop is not None and crop.size and not self._is_duplicate(dhash(crop)):
+                ok, jpeg = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+                if ok:
+                    meta = {"time": stamp, "box": [int(v) for v in box],
+                            "prediction": prediction.tolist()}
+                    batch.append((self._next_name(), jpeg.tobytes(), meta))
+            if batch and (len(batch) >= BATCH_SIZE or time.monotonic() - last_flush > FLUSH_INTERVAL):
+                self._write_batch(batch)
+                batch = []
+                last_flush = time.monotonic()
+        if batch:
+            self._write_batch(batch)
+
+    def close(self):
+        """Writes out everything still queued and stops the workers."""
+        self._running = False
+        for w in self._workers:
+            w.join()
+
+
+# =============================
+# Hot-path cost and write throughput
+# =============================
+def check_capture(crops=CHECK_RATE, seed=0):
+    """[(name, measured, limit)] for submit() cost and worker throughput; measured > limit
+    fails. Submits `crops` uncertain crops, paced at CHECK_RATE per second."""
+    import shutil
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    boxes = [(int(rng.integers(0, 500)), int(rng.integers(0, 340)), 120, 120)
+             for _ in range(crops)]
+    uncertain = np.array([0.45, 0.40, 0.05, 0.05, 0.05], np.float32)
+
+    out_dir = tempfile.mkdtemp(prefix="tomato_dataset_")
+    try:
+        # What writing inside the per-contour loop would cost, paced like submit() below:
+        # after each sleep caches are cold, which costs both sides several times their
+        # back-to-back time
+        inline = 0.0
+        for i, (x, y, w, h) in enumerate(boxes[:50]):
+            t0 = time.perf_counter()
+            cv2.imwrite(os.path.join(out_dir, f"inline_{i}.jpg"), frame[y:y+h, x:x+w])
+            inline += time.perf_counter() - t0
+            time.sleep(1.0 / CHECK_RATE)
+        inline /= min(50, len(boxes))
+
+        dataset = DatasetCapture(os.path.join(out_dir, "capture"), seed=seed)
+        hot = 0.0
+        for box in boxes:
+            t0 = time.perf_counter()
+            dataset.submit(frame, box, uncertain)
+            hot += time.perf_counter() - t0
+            time.sleep(1.0 / CHECK_RATE)   # rest of the per-crop loop
+        start = time.perf_counter()
+        dataset.close()
+        drain = time.perf_counter() - start
+        stats = dataset.stats
+    finally:
+        shutil.rmtree(out_dir)
+    hot /= len(boxes)
+    lost = stats["dropped"] + stats["over_budget"]
+    unaccounted = (stats["submitted"] - stats["sampled_out"] - lost - stats["duplicates"]
+                   - stats["written"])
+    return [
+        (f"submit() share of inline imwrite ({hot * 1e6:.0f} / {inline * 1e6:.0f} us)",
+         round(hot / inline, 3), HOT_PATH_SHARE),
+        ("crops dropped or over budget", lost, 0),
+        ("crops unaccounted for in stats", abs(unaccounted), 0),
+        ("close() drain seconds", round(drain, 3), DRAIN_BUDGET),
+    ]
+
+
+if __name__ == "__main__":
+    import sys
+
+    failed = 0
+    for name, measured, limit in check_capture():
+        ok = measured <= limit
+        failed += not ok
+        print(f"{name}: {measured} (limit {limit}) {'ok' if ok else 'FAILED'}")
+    sys.exit(1 if failed else 0)
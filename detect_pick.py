@@ -2,10 +2,15 @@ import time
 import board
 import busio
 import cv2
-import numpy as np
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
-from tflite_runtime.interpreter import Interpreter
+from capture import open_capture
+from joint_state import JointState
+from dataset_capture import DatasetCapture
+from frame_arena import FrameProcessor
+from inference_client import open_classifier
+from pick_scheduler import PickQueue, make_target
+from temporal_vote import PICK_CONFIDENCE, SequentialVoter
 
 # ==========================================
 # 1. ARM INITIALIZATION (Added to your script)
@@ -30,16 +35,11 @@ LIMITS = {
     GRIPPER_CH:  {"open": 170,    "close": 20}
 }
 
+# Commanded angles live here (and in joint_state.json), never read back over I2C
+joints = JointState(servos)
+
 def move_slow(channel_id, target_angle, speed=0.04):
-    current = servos[channel_id].angle
-    if current is None: current = 90
-    start_angle, target_angle = int(current), int(target_angle)
-    target_angle = max(0, min(180, target_angle))
-    if start_angle == target_angle: return
-    step = 1 if target_angle > start_angle else -1
-    for angle in range(start_angle, target_angle + step, step):
-        servos[channel_id].angle = angle
-        time.sleep(speed)
+    joints.move_slow(channel_id, target_angle, speed)
 
 def go_home():
     move_slow(GRIPPER_CH, LIMITS[GRIPPER_CH]["open"])
@@ -48,14 +48,16 @@ def go_home():
     move_slow(PITCH_CH, LIMITS[PITCH_CH]["neutral"])
     move_slow(BASE_CH, LIMITS[BASE_CH]["neutral"])
 
-def pick_and_drop():
-    # Sequence based on your requirements
-    move_slow(BASE_CH, 40)
-    move_slow(SHOULDER_CH, LIMITS[SHOULDER_CH]["pick"])
-    move_slow(ELBOW_CH, LIMITS[ELBOW_CH]["pick"])
+def pick_and_drop(pose=None):
+    # Sequence based on your requirements; pose comes from pick_scheduler.target_pose
+    if pose is None:
+        pose = {BASE_CH: 40, SHOULDER_CH: LIMITS[SHOULDER_CH]["pick"], ELBOW_CH: LIMITS[ELBOW_CH]["pick"]}
+    move_slow(BASE_CH, pose[BASE_CH])
+    move_slow(SHOULDER_CH, pose[SHOULDER_CH])
+    move_slow(ELBOW_CH, pose[ELBOW_CH])
     move_slow(GRIPPER_CH, LIMITS[GRIPPER_CH]["close"], speed=0.02)
     time.sleep(1)
-    servos[GRIPPER_CH].angle = None # Relax gripper
+    joints.relax(GRIPPER_CH) # Relax gripper
     # Return to neutral and release
     move_slow(ELBOW_CH, LIMITS[ELBOW_CH]["neutral"])
     move_slow(SHOULDER_CH, LIMITS[SHOULDER_CH]["neutral"])
@@ -69,24 +71,52 @@ def pick_and_drop():
 # NEW CODE (Paste this)
 MODEL_PATH = "tomato_model_pi_v11.tflite"
 
-try:
-    from tflite_runtime.interpreter import Interpreter
-    # Adding num_threads can sometimes help with initialization stability on Pi 5
-    interpreter = Interpreter(model_path=MODEL_PATH, num_threads=4)
-    print("✅ Interpreter initialized with multi-threading")
-except Exception as e:
-    print(f"❌ Standard load failed: {e}")
-    # Fallback to basic initialization
-    interpreter = Interpreter(model_path=MODEL_PATH)
-
-interpreter.allocate_tensors()
-
-# These must come AFTER allocate_tensors()
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
+# Shared inference server when it serves this model, otherwise a local interpreter
+classifier = open_classifier(MODEL_PATH, size=1, num_threads=4)
+
 HEALTHY_CLASS_INDEX = 1
 
-cap = cv2.VideoCapture(0)
+# Set to a folder to collect crops + predictions for retraining (written in the background)
+DATASET_DIR = None
+dataset = DatasetCapture(DATASET_DIR) if DATASET_DIR else None
+
+# Same red bands and 1000 px minimum as before, segmented into reused buffers
+processor = FrameProcessor(morphology=False)
+
+def detect_boxes(frame):
+    return processor.boxes(frame)
+
+def classify_crop(frame, box):
+    x, y, w, h = box
+    tomato_crop = frame[y:y+h, x:x+w]
+    if tomato_crop.size == 0: return None
+
+    # --- AI INFERENCE ---
+    prediction = classifier.classify([tomato_crop])[0]
+    if dataset: dataset.submit(frame, box, prediction)
+    return prediction
+
+# Evidence is accumulated per fruit over frames; a fruit is picked (or skipped) as soon as
+# it suffices and is not classified again after that (see temporal_vote.py). The voter's
+# decision is the only pick gate, for the first fruit of a queue and for revalidated ones.
+voter = SequentialVoter()
+
+def observe(frame, track):
+    prediction = classify_crop(frame, track.box)
+    if prediction is not None:
+        voter.observe(track, float(prediction[HEALTHY_CLASS_INDEX]))
+
+def vote_health(frame, box):
+    """(picked, confidence) for a fresh box: one more frame of evidence if its fruit is
+    still undecided, then the voter's decision."""
+    track = voter.track_at(box)
+    if track is None: return False, 0.0
+    if not track.finished: observe(frame, track)
+    return track.decision is True, track.confidence
+
+# Background grabber: always hands out the newest frame, never one queued up during a pick
+CAMERA_SOURCE = 0
+cap = open_capture(CAMERA_SOURCE)
 go_home()
 
 try:
@@ -94,45 +124,33 @@ try:
         ret, frame = cap.read()
         if not ret: break
 
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        mask_red = cv2.inRange(hsv, np.array([0, 120, 70]), np.array([10, 255, 255])) + \
-                   cv2.inRange(hsv, np.array([170, 120, 70]), np.array([180, 255, 255]))
-        
-        contours, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        for cnt in contours:
-            if cv2.contourArea(cnt) < 1000: continue
-            
-            x, y, w, h = cv2.boundingRect(cnt)
-            tomato_crop = frame[y:y+h, x:x+w]
-            if tomato_crop.size == 0: continue
-
-            # --- AI INFERENCE ---
-            img = cv2.resize(tomato_crop, (224, 224)).astype(np.float32) / 255.0
-            img = np.expand_dims(img, axis=0)
-            interpreter.set_tensor(input_details[0]['index'], img)
-            interpreter.invoke()
-            prediction = interpreter.get_tensor(output_details[0]['index'])[0]
-            class_idx = np.argmax(prediction)
-            confidence = prediction[class_idx]
+        # Classify undecided fruits before drawing so dataset crops stay clean
+        tracks = voter.update(detect_boxes(frame))
+        for track in tracks:
+            if not track.finished: observe(frame, track)
+
+        healthy_targets = []
+        for track in tracks:
+            box, healthy, confidence = track.box, track.decision, track.confidence
+            x, y, w, h = box
 
             # --- VISUAL OUTPUT LOGIC ---
-            if class_idx == HEALTHY_CLASS_INDEX and confidence >= 0.60:
-                # 1. DRAW GREEN BOX FOR HEALTHY
+            if healthy is None:
+                # 0. STILL COLLECTING EVIDENCE, OR UNDECIDED AFTER MAX_FRAMES (No Arm Movement)
+                color = (128, 128, 128) if track.finished else (0, 255, 255)
+                status = "Undecided" if track.finished else f"Checking {track.frames}"
+                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 1)
+                cv2.putText(frame, status, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+            elif healthy:
+                # 1. DRAW GREEN BOX FOR HEALTHY, QUEUE FOR PICKING
                 color = (0, 255, 0)
                 label_status = "Healthy"
                 cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
                 cv2.putText(frame, "Ripe", (x, y - 35), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
                 cv2.putText(frame, label_status, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-                
-                # 2. TRIGGER PICK ONLY HERE
-                cv2.imshow("Harvest Vision", frame)
-                cv2.waitKey(1)
-                print(f"🎯 {label_status} Tomato! Picking...")
-                pick_and_drop()
-                break 
+                healthy_targets.append(make_target(box, confidence, frame.shape))
             else:
-                # 3. DRAW RED BOX FOR UNHEALTHY (No Arm Movement)
+                # 2. DRAW RED BOX FOR UNHEALTHY (No Arm Movement)
                 color = (0, 0, 255)
                 label_status = "Unhealthy"
                 cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
@@ -142,7 +160,32 @@ try:
         cv2.imshow("Harvest Vision", frame)
         if cv2.waitKey(1) & 0xFF == ord('q'): break
 
+        # 3. PICK EVERY HEALTHY TOMATO IN TRAVEL-OPTIMAL ORDER
+        queue = PickQueue(healthy_targets)
+        target = queue.pop()
+        while target is not None:
+            age = cap.mark_decision()
+            print(f"🎯 Healthy Tomato! Picking... (frame age {age * 1000:.0f} ms, {len(queue)} queued)")
+            pick_and_drop(target.pose)
+            picked = voter.track_at((target.x, target.y, target.w, target.h))
+            if picked is not None: voter.forget(picked)
+            target = None
+            # Re-check only the next queued fruit on a fresh frame instead of a full rescan
+            while len(queue) and target is None:
+                ret, frame = cap.read()
+                if not ret: break
+                boxes = detect_boxes(frame)
+                voter.update(boxes)
+                target = queue.revalidate(queue.pop(), boxes,
+                                          lambda box: vote_health(frame, box),
+                                          frame.shape, PICK_CONFIDENCE)
+
 finally:
+    print(cap.stats.summary())
+    print(f"{voter.decided} fruits decided after {voter.mean_frames_to_decision:.1f} frames on average, "
+          f"{voter.undecided} left undecided, {voter.inferences} inferences")
     cap.release()
+    classifier.close()
+    if dataset: dataset.close()
     cv2.destroyAllWindows()
     pca.deinit()
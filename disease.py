@@ -1,11 +1,27 @@
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
+from capture import open_capture
+from inference_client import open_classifier
+from tile_heatmap import BATCH_SIZE, BatchedClassifier, TileHeatmap, overlay
 
 # ----------------------------
 # 1️⃣ Load your trained model
 # ----------------------------
-model = load_model("tomatofinal.h5")  # Use your local path
+# tomatofinal.h5 converted with convert.py; served by inference_server.py when it is running
+MODEL_PATH = "tomato_model_pi.tflite"
+
+# Tiled mode classifies overlapping tiles of the fruit regions in batches and shows a
+# disease heatmap; otherwise the whole frame is squashed into one model input. Tiles go
+# to the inference server when it is running (batched with the other clients, up to
+# MAX_BATCH per invoke); without it a local BatchedClassifier batches them.
+TILED = True
+if TILED:
+    classifier = open_classifier(
+        MODEL_PATH,
+        local=lambda: BatchedClassifier(MODEL_PATH, batch_size=BATCH_SIZE, num_threads=4))
+    tiler = TileHeatmap(classifier)
+else:
+    classifier = open_classifier(MODEL_PATH, size=1, num_threads=4)
 print("✅ Model loaded successfully!")
 
 # ----------------------------
@@ -22,11 +38,9 @@ class_names = [
 # ----------------------------
 # 3️⃣ Open webcam
 # ----------------------------
-cap = cv2.VideoCapture(0)  # 0 = default laptop camera
-
-# Optional: set camera width & height
-cap.set(3, 640)  # width
-cap.set(4, 480)  # height
+# 0 = default laptop camera, "bus" to share it via frame_bus.py; opened at 640x480
+CAMERA_SOURCE = 0
+cap = open_capture(CAMERA_SOURCE)
 
 while True:
     ret, frame = cap.read()
@@ -34,14 +48,31 @@ while True:
         print("Failed to grab frame")
         break
 
-    # Preprocess frame for model
-    img = cv2.resize(frame, (224, 224))  # match your model input size
-    img = img / 255.0
-    img = np.expand_dims(img, axis=0)
+    if TILED:
+        tiles, heat = tiler.analyze(frame)
+        if not tiles:
+            cv2.putText(frame, "No fruit in view", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8,
+                        (255, 255, 255), 2)
+            cv2.imshow("Tomato Disease Detection", frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
 
-    # Predict
-    prediction = model.predict(img)
-    class_idx = np.argmax(prediction[0])
+        # Heat = strongest disease class per cell (index 0 is healthy)
+        overlay(frame, heat[1:].max(axis=0))
+        for x, y, size, pred in tiles:
+            idx = int(np.argmax(pred))
+            if idx != 0:
+                cv2.rectangle(frame, (x, y), (x + size, y + size), (0, 0, 255), 1)
+                cv2.putText(frame, f"{class_names[idx]} {pred[idx]*100:.0f}%", (x + 4, y + 16),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 255), 1)
+        # The frame-level verdict is the most confident diseased tile, if any
+        prediction = max((pred for _, _, _, pred in tiles),
+                         key=lambda p: (int(np.argmax(p)) != 0, float(np.max(p))))
+    else:
+        # Predict (resized to the model input size by the classifier)
+        prediction = classifier.classify([frame])[0]
+    class_idx = np.argmax(prediction)
     disease_class = class_names[class_idx]
 
     # Binary prediction
@@ -64,4 +95,5 @@ while True:
         break
 
 cap.release()
+classifier.close()
 cv2.destroyAllWindows()
\ No newline at end of file
@@ -0,0 +1,220 @@
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# =============================
+# Segmentation constants (ripe = red, two hue bands)
+# =============================
+LOWER_RED1 = np.array([0, 120, 70], np.uint8)
+UPPER_RED1 = np.array([10, 255, 255], np.uint8)
+LOWER_RED2 = np.array([170, 120, 70], np.uint8)
+UPPER_RED2 = np.array([180, 255, 255], np.uint8)
+KERNEL = np.ones((5, 5), np.uint8)
+MIN_AREA = 1000
+MODEL_SIZE = 224
+
+
+# =============================
+# Buffer arena
+# =============================
+class FrameArena:
+    """Preallocated per-frame buffers, reallocated only when the resolution changes."""
+
+    def __init__(self):
+        self.shape = None
+        self.reallocations = 0
+        self.hsv = None
+        self.mask1 = None
+        self.mask2 = None
+        self.mask = None
+        self.morph = None
+        # Model input is independent of the camera resolution
+        self.resized = np.empty((MODEL_SIZE, MODEL_SIZE, 3), np.uint8)
+        self.model_input = np.empty((1, MODEL_SIZE, MODEL_SIZE, 3), np.float32)
+
+    def ensure(self, frame):
+        shape = frame.shape[:2]
+        if shape == self.shape:
+            return
+        h, w = shape
+        self.hsv = np.empty((h, w, 3), np.uint8)
+        self.mask1 = np.empty((h, w), np.uint8)
+        self.mask2 = np.empty((h, w), np.uint8)
+        self.mask = np.empty((h, w), np.uint8)
+        self.morph = np.empty((h, w), np.uint8)
+        self.shape = shape
+        self.reallocations += 1
+
+
+class FrameProcessor:
+    """HSV segmentation and crop preprocessing that write into a FrameArena via dst=."""
+
+    def __init__(self, morphology=True):
+        self.arena = FrameArena()
+        self.morphology = morphology
+        self._small = None
+
+    def segment(self, frame):
+        """Ripe (red) mask of frame. The returned array is reused on the next call."""
+        a = self.arena
+        a.ensure(frame)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=a.hsv)
+        cv2.inRange(a.hsv, LOWER_RED1, UPPER_RED1, dst=a.mask1)
+        cv2.inRange(a.hsv, LOWER_RED2, UPPER_RED2, dst=a.mask2)
+        cv2.bitwise_or(a.mask1, a.mask2, dst=a.mask)
+        if self.morphology:
+            cv2.morphologyEx(a.mask, cv2.MORPH_OPEN, KERNEL, dst=a.morph)
+            cv2.morphologyEx(a.morph, cv2.MORPH_DILATE, KERNEL, dst=a.mask)
+        return a.mask
+
+    def boxes(self, frame, min_area=MIN_AREA, scale=1.0):
+        """Bounding boxes of ripe blobs in frame coordinates.
+
+        scale < 1 segments a downscaled copy of the frame (cheaper, coarser boxes).
+        Contours are the only per-frame allocation left.
+        """
+        src = frame
+        if scale != 1.0:
+            h, w = frame.shape[:2]
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+                self._small = np.empty((size[1], size[0], 3), np.uint8)
+            cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+            src = self._small
+            min_area *= scale * scale
+        contours, _ = cv2.findContours(self.segment(src), cv2.RETR_EXTERNAL,
+                                       cv2.CHAIN_APPROX_SIMPLE)
+        boxes = [cv2.boundingRect(cnt) for cnt in contours if cv2.contourArea(cnt) >= min_area]
+        if scale != 1.0:
+            boxes = [(int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+                     for x, y, w, h in boxes]
+        return boxes
+
+    def preprocess(self, crop):
+        """(1, 224, 224, 3) float32 model input for crop, scaled to [0, 1]."""
+        a = self.arena
+        cv2.resize(crop, (MODEL_SIZE, MODEL_SIZE), dst=a.resized)
+        # uint8 -> float32 copy, then an in-place float32 scale: no float64 cast buffers
+        np.copyto(a.model_input[0], a.resized)
+        a.model_input *= np.float32(1.0 / 255.0)
+        return a.model_input
+
+
+# =============================
+# Reference path (what the scripts did before)
+# =============================
+def segment_naive(frame):
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, np.array([0, 120, 70]), np.array([10, 255, 255])) + \
+           cv2.inRange(hsv, np.array([170, 120, 70]), np.array([180, 255, 255]))
+    kernel = np.ones((5, 5), np.uint8)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+    return cv2.morphologyEx(mask, cv2.MORPH_DILATE, kernel)
+
+
+def preprocess_naive(crop):
+    img = cv2.resize(crop, (MODEL_SIZE, MODEL_SIZE)).astype(np.float32) / 255.0
+    return np.expand_dims(img, axis=0)
+
+
+# =============================
+# Allocation and timing checks
+# =============================
+def synthetic_frame(width=1280, height=720, num_fruits=4):
+    frame = np.full((height, width, 3), (40, 90, 40), np.uint8)
+    for i in range(num_fruits):
+        center = (width * (i + 1) // (num_fruits + 1), height // 2)
+        cv2.circle(frame, center, height // 10, (30, 30, 200), -1)
+    return frame
+
+
+def allocated_per_frame(step, frame, iterations=50, warmup=5):
+    """Peak bytes traced by tracemalloc per call of step(frame), after warmup."""
+    for _ in range(warmup):
+        step(frame)
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            step(frame)
+            _, frame_peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame_peak - before)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def time_per_frame(step, frame, iterations=100):
+    step(frame)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        step(frame)
+    return (time.perf_counter() - start) / iterations
+
+
+def _processor_step(processor):
+    def step(frame):
+        for x, y, w, h in processor.boxes(frame):
+            processor.preprocess(frame[y:y+h, x:x+w])
+    return step
+
+
+def _naive_step(frame):
+    contours, _ = cv2.findContours(segment_naive(frame), cv2.RETR_EXTERNAL,
+                                   cv2.CHAIN_APPROX_SIMPLE)
+    for cnt in contours:
+        if cv2.contourArea(cnt) < MIN_AREA:
+            continue
+        x, y, w, h = cv2.boundingRect(cnt)
+        preprocess_naive(frame[y:y+h, x:x+w])
+
+
+# Steady-state allocation budgets per 720p frame, checked by bench.py on every run.
+# segment() + preprocess() write only into arena buffers: anything beyond interpreter
+# noise means a temporary crept back in. boxes() may add the contour point arrays
+# (four ~200-point contours are ~7 KiB on synthetic_frame()) and the box list. One
+# 720p mask is 900 KiB, so a reintroduced frame-sized temporary fails either budget.
+SEGMENT_BUDGET = 2 * 1024
+BOXES_BUDGET = 16 * 1024
+
+
+def check_allocations(frame=None):
+    """[(name, measured, limit)] for the arena's allocation budgets; measured > limit fails."""
+    frame = synthetic_frame() if frame is None else frame
+    processor = FrameProcessor()
+    crop = frame[:MODEL_SIZE, :MODEL_SIZE]
+
+    def segment_step(frame):
+        processor.segment(frame)
+        processor.preprocess(crop)
+
+    return [
+        ("segment + preprocess bytes/frame", allocated_per_frame(segment_step, frame),
+         SEGMENT_BUDGET),
+        ("boxes + preprocess bytes/frame",
+         allocated_per_frame(_processor_step(processor), frame), BOXES_BUDGET),
+        ("arena allocations", processor.arena.reallocations, 1),
+    ]
+
+
+if __name__ == "__main__":
+    import sys
+
+    frame = synthetic_frame()
+    naive_bytes = allocated_per_frame(_naive_step, frame)
+    print(f"Allocated per frame @720p: naive {naive_bytes / 1024:.0f} KiB")
+    failed = 0
+    for name, measured, limit in check_allocations(frame):
+        ok = measured <= limit
+        failed += not ok
+        print(f"  arena {name}: {measured} (limit {limit}) {'ok' if ok else 'OVER BUDGET'}")
+
+    arena_step = _processor_step(FrameProcessor())
+    naive_ms = time_per_frame(_naive_step, frame) * 1000
+    arena_ms = time_per_frame(arena_step, frame) * 1000
+    print(f"Time per frame @720p: naive {naive_ms:.2f} ms, arena {arena_ms:.2f} ms")
+    sys.exit(1 if failed else 0)
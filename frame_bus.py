@@ -0,0 +1,267 @@
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from capture import LatencyStats, make_source
+
+# =============================
+# Shared-memory frame ring
+# =============================
+# One publisher process owns the camera and decodes straight into a ring of frames in
+# shared memory; any number of subscriber processes read the newest one.
+#
+# Layout: header (8 x int64), per-slot sequence numbers (int64), per-slot capture
+# timestamps (float64, time.monotonic), then the frames (slots x H x W x 3 uint8).
+# A slot's sequence number is 0 while it is being written, so readers can tell a
+# frame that was overwritten under them.
+BUS_NAME = "tomato_frames"
+SLOTS = 4
+MAGIC = 0x544F4D41            # "TOMA"
+H_MAGIC, H_SLOTS, H_HEIGHT, H_WIDTH, H_FPS_MILLI, H_LATEST = range(6)
+HEADER_LEN = 8
+
+
+def _layout(buf, slots, height, width):
+    header = np.ndarray((HEADER_LEN,), np.int64, buf, 0)
+    offset = HEADER_LEN * 8
+    seqs = np.ndarray((slots,), np.int64, buf, offset)
+    offset += slots * 8
+    stamps = np.ndarray((slots,), np.float64, buf, offset)
+    offset += slots * 8
+    frames = np.ndarray((slots, height, width, 3), np.uint8, buf, offset)
+    return header, seqs, stamps, frames
+
+
+def _size(slots, height, width):
+    return HEADER_LEN * 8 + slots * 16 + slots * height * width * 3
+
+
+# =============================
+# Publisher
+# =============================
+def publish(spec=0, name=BUS_NAME, slots=SLOTS, stop=None, **source_kwargs):
+    """Owns the camera and publishes every frame into the ring until interrupted or stop is set."""
+    source = make_source(spec, **source_kwargs)
+    if not source.open():
+        print(f"❌ Could not open capture source {spec!r}")
+        return
+    ret, first = source.read()
+    if not ret:
+        print("❌ No frame from capture source")
+        return
+    height, width = first.shape[:2]
+    try:
+        stale = shared_memory.SharedMemory(name=name)
+        stale.close()
+        stale.unlink()
+    except FileNotFoundError:
+        pass
+    shm = shared_memory.SharedMemory(name=name, create=True, size=_size(slots, height, width))
+    header, seqs, stamps, frames = _layout(shm.buf, slots, height, width)
+    seqs[:] = 0
+    header[:] = 0
+    header[H_SLOTS], header[H_HEIGHT], header[H_WIDTH] = slots, height, width
+    header[H_FPS_MILLI] = int(getattr(source, "fps", 30) * 1000)
+    header[H_MAGIC] = MAGIC
+    print(f"✅ Publishing {width}x{height} frames on shared memory '{name}'")
+
+    seq = 0
+    try:
+        while stop is None or not stop.is_set():
+            seq += 1
+            slot = seq % slots
+            seqs[slot] = 0
+            ret, frame = source.read(frames[slot])
+            stamp = time.monotonic()
+            if not ret:
+                break
+            if frame.ctypes.data != frames[slot].ctypes.data:
+                if frame.shape != frames[slot].shape:
+                    print(f"❌ Resolution changed to {frame.shape[1]}x{frame.shape[0]}, stopping")
+                    break
+                np.copyto(frames[slot], frame)
+            stamps[slot] = stamp
+            seqs[slot] = seq
+            header[H_LATEST] = seq
+    except KeyboardInterrupt:
+        pass
+    finally:
+        source.release()
+        header[H_MAGIC] = 0
+        del header, seqs, stamps, frames
+        shm.close()
+        shm.unlink()
+
+
+# =============================
+# Subscriber
+# =============================
+class FrameBusSubscriber:
+    """Reads the newest published frame. Same read()/release() shape as VideoCapture.
+
+    With copy=True each frame is copied once into a private buffer the caller may draw
+    on. read_view() hands out the shared frame itself (zero-copy, must not be written),
+    still_valid() tells whether it has since been overwritten.
+    """
+
+    def __init__(self, name=BUS_NAME, copy=True, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        # The publisher owns the block; keep our tracker from unlinking it on exit
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        header = np.ndarray((HEADER_LEN,), np.int64, self.shm.buf, 0)
+        while header[H_MAGIC] != MAGIC:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"frame bus '{name}' not initialised")
+            time.sleep(0.01)
+        slots, height, width = int(header[H_SLOTS]), int(header[H_HEIGHT]), int(header[H_WIDTH])
+        del header
+        self.header, self.seqs, self.stamps, self.frames = _layout(self.shm.buf, slots, height, width)
+        self.slots = slots
+        self.period = 1000.0 / max(1, int(self.header[H_FPS_MILLI]))
+        self.copy = copy
+        self.buffer = np.empty((height, width, 3), np.uint8) if copy else None
+        self.last_seq = 0
+        self.timestamp = None
+        self.dropped = 0
+        self.stats = LatencyStats()
+
+    def _wait_newer(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.header[H_MAGIC] != MAGIC:
+                return 0
+            seq = int(self.header[H_LATEST])
+            if seq > self.last_seq:
+                return seq
+            now = time.monotonic()
+            if now > deadline:
+                return 0
+            # Sleep most of the way to the next expected frame, then poll finely
+            expected = self.stamps[seq % self.slots] + self.period if seq else now
+            time.sleep(max(0.0005, min(expected - now - 0.002, deadline - now)))
+
+    def read_view(self, timeout=1.0):
+        """(seq, frame view) of the newest frame; frame is shared, read-only by contract."""
+        while True:
+            seq = self._wait_newer(timeout)
+            if not seq:
+                return 0, None
+            slot = seq % self.slots
+            if self.seqs[slot] == seq:
+                break
+            # Overwritten before we got to it: a newer frame is already there
+        if self.last_seq:
+            self.dropped += seq - self.last_seq - 1
+        self.last_seq = seq
+        self.timestamp = float(self.stamps[slot])
+        return seq, self.frames[slot]
+
+    def still_valid(self, seq):
+        return self.seqs[seq % self.slots] == seq
+
+    def read(self, timeout=1.0):
+        """Returns (ret, frame) like VideoCapture.read."""
+        for _ in range(3):
+            seq, view = self.read_view(timeout)
+            if not seq:
+                return False, None
+            if not self.copy:
+                return True, view
+            np.copyto(self.buffer, view)
+            if self.still_valid(seq):
+                return True, self.buffer
+        return False, None
+
+    def frame_age(self):
+        if self.timestamp is None:
+            return 0.0
+        return time.monotonic() - self.timestamp
+
+    def mark_decision(self):
+        age = self.frame_age()
+        self.stats.record(age)
+        return age
+
+    def isOpened(self):
+        return self.header is not None and self.header[H_MAGIC] == MAGIC
+
+    def release(self):
+        self.header = self.seqs = self.stamps = self.frames = None
+        self.shm.close()
+
+
+# =============================
+# Latency / CPU: shared bus vs one capture per process
+# =============================
+def _subscriber_worker(spec, use_bus, seconds, results):
+    if use_bus:
+        cap = FrameBusSubscriber(copy=False)
+    else:
+        from capture import open_capture
+        cap = open_capture(spec)
+    start = time.monotonic()
+    frames = 0
+    while time.monotonic() - start < seconds:
+        ret, _ = cap.read()
+        if not ret:
+            break
+        cap.mark_decision()
+        frames += 1
+    results.put((frames, cap.stats.mean(), cap.stats.percentile(95)))
+    cap.release()
+
+
+def benchmark(spec="synthetic", subscriber_counts=(1, 2, 3, 4), seconds=5.0):
+    import multiprocessing as mp
+    import resource
+
+    def children_cpu():
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    print("mode         subs  fps/sub  age ms  p95 ms  total CPU %")
+    for count in subscriber_counts:
+        for use_bus in (False, True):
+            cpu_before = children_cpu()
+            stop = mp.Event()
+            publisher = None
+            if use_bus:
+                publisher = mp.Process(target=publish, args=(spec,), kwargs={"stop": stop})
+                publisher.start()
+            results = mp.Queue()
+            workers = [mp.Process(target=_subscriber_worker, args=(spec, use_bus, seconds, results))
+                       for _ in range(count)]
+            for w in workers:
+                w.start()
+            rows = [results.get() for _ in workers]
+            for w in workers:
+                w.join()
+            if publisher is not None:
+                stop.set()
+                publisher.join()
+            total_cpu = (children_cpu() - cpu_before) / seconds
+            fps = sum(r[0] for r in rows) / count / seconds
+            age = sum(r[1] for r in rows) / count * 1000
+            p95 = max(r[2] for r in rows) * 1000
+            mode = "frame bus" if use_bus else "own capture"
+            print(f"{mode:12s} {count:4d}  {fps:7.1f}  {age:6.1f}  {p95:6.1f}  {total_cpu * 100:10.0f}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python frame_bus.py [source]      publish the camera (or a video / image dir)
+    # python frame_bus.py --benchmark   compare against one capture per process
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        benchmark()
+    else:
+        publish(sys.argv[1] if len(sys.argv) > 1 else 0)
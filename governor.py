@@ -0,0 +1,156 @@
+import time
+
+# =============================
+# Degradation levels, cheapest quality loss first
+# =============================
+# max_crops  : crops classified per frame, largest fruit first (None = all)
+# seg_scale  : resolution the HSV mask is computed at
+# stride     : run detection + classification on every Nth frame, redraw the rest
+LEVELS = [
+    {"max_crops": None, "seg_scale": 1.0, "stride": 1},
+    {"max_crops": 4,    "seg_scale": 1.0, "stride": 1},
+    {"max_crops": 3,    "seg_scale": 0.5, "stride": 1},
+    {"max_crops": 2,    "seg_scale": 0.5, "stride": 2},
+    {"max_crops": 1,    "seg_scale": 0.5, "stride": 3},
+]
+
+TARGET_FPS = 15
+SMOOTHING = 0.2         # EWMA weight of the newest frame time
+DEGRADE_AFTER = 3       # consecutive over-budget frames before stepping down
+RESTORE_AFTER = 30      # consecutive frames with headroom before stepping back up
+HEADROOM = 0.6          # frame time below this share of the budget counts as headroom
+
+
+class LoadGovernor:
+    """Keeps the vision loop at a target frame rate by shedding work when it falls behind.
+
+    Call should_process() once per captured frame and wrap the work of processed frames
+    in begin()/end(). Frame time is smoothed and compared to the budget with hysteresis,
+    so a single slow frame does not change the level.
+    """
+
+    def __init__(self, target_fps=TARGET_FPS, levels=LEVELS, clock=time):
+        self.budget = 1.0 / target_fps
+        self.levels = levels
+        self.clock = clock
+        self.level = 0
+        self.frame_time = 0.0
+        self.changes = 0
+        self._frame = 0
+        self._over = 0
+        self._under = 0
+        self._start = None
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def should_process(self):
+        """True when this frame gets detection + classification at the current level."""
+        self._frame += 1
+        return self._frame % self.settings["stride"] == 0
+
+    def select(self, boxes):
+        """Boxes to classify this frame: all of them, or the largest max_crops."""
+        limit = self.settings["max_crops"]
+        if limit is None or len(boxes) <= limit:
+            return boxes
+        return sorted(boxes, key=lambda b: b[2] * b[3], reverse=True)[:limit]
+
+    def begin(self):
+        self._start = self.clock.monotonic()
+
+    def end(self):
+        elapsed = self.clock.monotonic() - self._start
+        self.observe(elapsed / self.settings["stride"])
+
+    def observe(self, frame_time):
+        """Feeds the average work time per captured frame and adjusts the level."""
+        if self.frame_time == 0.0:
+            self.frame_time = frame_time
+        else:
+            self.frame_time += SMOOTHING * (frame_time - self.frame_time)
+
+        if self.frame_time > self.budget:
+            self._over += 1
+            self._under = 0
+        elif self.frame_time < HEADROOM * self.budget:
+            self._under += 1
+            self._over = 0
+        else:
+            self._over = self._under = 0
+
+        if self._over >= DEGRADE_AFTER and self.level < len(self.levels) - 1:
+            self._set_level(self.level + 1)
+        elif self._under >= RESTORE_AFTER and self.level > 0:
+            self._set_level(self.level - 1)
+
+    def _set_level(self, level):
+        self.level = level
+        self.changes += 1
+        self._over = self._under = 0
+        # Restart the average at the new level rather than carrying the old cost over
+        self.frame_time = 0.0
+
+    def describe(self):
+        s = self.settings
+        crops = "all" if s["max_crops"] is None else s["max_crops"]
+        return (f"L{self.level} crops:{crops} seg:{s['seg_scale']:.1f}x "
+                f"1/{s['stride']} frames, {self.frame_time * 1000:.0f} ms")
+
+
+# =============================
+# FPS stability under synthetic load
+# =============================
+SIM_CAMERA_FPS = 30       # new frames arrive no faster than this
+SIM_CAPTURE_S = 0.002     # grab + display per frame
+SIM_SEGMENT_S = 0.012     # HSV mask + contours at full resolution
+SIM_CROP_S = 0.045        # one crop through the model
+
+
+def _simulate(use_governor, frames=1500, seed=0):
+    import random
+    import statistics
+
+    from sim_servo import SimClock
+
+    rng = random.Random(seed)
+    clock = SimClock()
+    governor = LoadGovernor(clock=clock)
+    periods, stamps = [], []
+    last = clock.monotonic()
+    for i in range(frames):
+        # Quiet scene, then a busy stretch with many fruits, then quiet again
+        busy = frames // 3 <= i < 2 * frames // 3
+        boxes = [(0, 0, rng.randint(40, 120), rng.randint(40, 120))
+                 for _ in range(rng.randint(5, 9) if busy else rng.randint(0, 1))]
+        clock.sleep(SIM_CAPTURE_S)
+        if not use_governor:
+            clock.sleep(SIM_SEGMENT_S + SIM_CROP_S * len(boxes))
+        elif governor.should_process():
+            governor.begin()
+            scale = governor.settings["seg_scale"]
+            clock.sleep(SIM_SEGMENT_S * scale * scale + SIM_CROP_S * len(governor.select(boxes)))
+            governor.end()
+        # Wait for the next camera frame if the work finished early
+        clock.sleep(last + 1.0 / SIM_CAMERA_FPS - clock.monotonic())
+        now = clock.monotonic()
+        periods.append(now - last)
+        stamps.append(now)
+        last = now
+    # Frames shown per one-second window during the busy stretch
+    busy = slice(frames // 3 + 60, 2 * frames // 3)   # skip the first 2 s of adaptation
+    busy_stamps = stamps[busy]
+    windows = {}
+    for stamp in busy_stamps:
+        windows[int(stamp)] = windows.get(int(stamp), 0) + 1
+    fps = list(windows.values())[1:-1] or [0]
+    return statistics.mean(fps), statistics.pstdev(fps), max(periods[busy]), governor.changes
+
+
+if __name__ == "__main__":
+    print(f"Target {TARGET_FPS} fps, busy scene of 5-9 fruits")
+    for name, use in (("no governor", False), ("governor", True)):
+        mean, stdev, worst, changes = _simulate(use)
+        print(f"{name:12s}: busy fps (1 s windows) {mean:5.1f} ± {stdev:4.1f}, "
+              f"worst frame {worst * 1000:4.0f} ms, {changes} level changes")
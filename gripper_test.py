@@ -3,6 +3,7 @@ import board
 import busio
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
+from joint_state import JointState
 
 # --- CONFIGURATION ---
 GRIPPER_CHANNEL = 5  # <--- CHANGE THIS to your actual gripper channel
@@ -20,21 +21,27 @@ gripper = servo.Servo(pca.channels[GRIPPER_CHANNEL],
                       actuation_range=MAX_ANGLE, 
                       min_pulse=MIN_PULSE, 
                       max_pulse=MAX_PULSE)
+# Records the gripper angle in the shared joint state; other channels are kept as saved
+joints = JointState({GRIPPER_CHANNEL: gripper})
+
+def set_gripper(angle):
+    joints.command(GRIPPER_CHANNEL, angle)
+    joints.save()
 
 def test_gripper():
     print(f"Testing Gripper on Channel {GRIPPER_CHANNEL}...")
     try:
         while True:
             print("Closing (0 degrees)...")
-            gripper.angle = 10
+            set_gripper(10)
             time.sleep(2)
             
             print("Middle (90 degrees)...")
-            gripper.angle = 90
+            set_gripper(90)
             time.sleep(2)
             
             print("Opening (180 degrees)...")
-            gripper.angle = 180
+            set_gripper(180)
             time.sleep(2)
             
     except KeyboardInterrupt:
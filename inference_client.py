@@ -0,0 +1,151 @@
+import os
+import socket
+from multiprocessing import shared_memory
+
+import cv2
+
+from inference_server import (HELLO, INFO, MODEL_PATH, REQ, RESP, RESP_ERROR, SOCKET_PATH,
+                              recv_exact, shm_size, shm_views)
+from interpreter_pool import InterpreterPool
+
+
+class InferenceClient:
+    """Sends crops to the local inference server through shared memory."""
+
+    def __init__(self, socket_path=SOCKET_PATH, max_crops=16):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        info = recv_exact(self.sock, INFO.size)
+        self.height, self.width, self.num_classes, name_len = INFO.unpack(info)
+        self.model_name = recv_exact(self.sock, name_len).decode()
+        self.max_crops = max_crops
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=shm_size(max_crops, self.height, self.width, self.num_classes))
+        self.crops, self.preds = shm_views(self.shm, max_crops, self.height, self.width,
+                                           self.num_classes)
+        name = self.shm.name.encode()
+        self.sock.sendall(HELLO.pack(max_crops, len(name)) + name)
+        self.seq = 0
+
+    def classify(self, crops):
+        """Predictions for crops, in input order."""
+        results = []
+        for start in range(0, len(crops), self.max_crops):
+            chunk = crops[start:start + self.max_crops]
+            for i, crop in enumerate(chunk):
+                cv2.resize(crop, (self.width, self.height), dst=self.crops[i])
+            self.seq += 1
+            self.sock.sendall(REQ.pack(self.seq, len(chunk)))
+            reply = recv_exact(self.sock, RESP.size)
+            if reply is None:
+                raise ConnectionError("inference server closed the connection")
+            seq, count = RESP.unpack(reply)
+            if seq != self.seq:
+                raise ConnectionError(f"inference server answered request {seq}, "
+                                      f"expected {self.seq}")
+            if count == RESP_ERROR:
+                raise RuntimeError(f"inference server failed on request {seq}")
+            results.extend(self.preds[i].copy() for i in range(count))
+        return results
+
+    def close(self):
+        self.sock.close()
+        self.crops = self.preds = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+def open_classifier(model_path=MODEL_PATH, socket_path=SOCKET_PATH, local=None, **pool_kwargs):
+    """Server client when one is serving model_path, otherwise a local classifier:
+    local() if given (e.g. a BatchedClassifier), else an InterpreterPool."""
+    def load_locally():
+        return local() if local is not None else InterpreterPool(model_path, **pool_kwargs)
+
+    try:
+        client = InferenceClient(socket_path)
+    except OSError:
+        print("ℹ️ No inference server running, loading the model locally")
+        return load_locally()
+    if client.model_name != os.path.basename(model_path):
+        print(f"ℹ️ Inference server serves {client.model_name}, loading {model_path} locally")
+        client.close()
+        return load_locally()
+    print(f"✅ Using inference server for {client.model_name}")
+    return client
+
+
+# =============================
+# Load test: throughput and tail latency vs number of clients
+# =============================
+def _client_worker(socket_path, requests, results):
+    import time
+
+    import numpy as np
+
+    rng = np.random.default_rng(os.getpid())
+    crops = [rng.integers(0, 256, (120, 120, 3), dtype=np.uint8) for _ in range(3)]
+    client = InferenceClient(socket_path)
+    latencies = []
+    try:
+        for _ in range(requests):
+            count = int(rng.integers(1, 4))
+            start = time.perf_counter()
+            client.classify(crops[:count])
+            latencies.append((time.perf_counter() - start, count))
+    finally:
+        client.close()
+    results.put(latencies)
+
+
+SERVER_START_TIMEOUT = 30.0   # seconds for the server to load the model and listen
+
+
+def load_test(model_path=MODEL_PATH, client_counts=(1, 2, 4, 8), requests=100):
+    import multiprocessing as mp
+    import time
+
+    socket_path = f"/tmp/tomato_infer_loadtest_{os.getpid()}.sock"
+    server = mp.Process(target=_serve_quietly, args=(model_path, socket_path), daemon=True)
+    server.start()
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while not os.path.exists(socket_path):
+        if not server.is_alive():
+            raise RuntimeError(f"inference server exited with code {server.exitcode} "
+                               "before listening")
+        if time.monotonic() > deadline:
+            server.terminate()
+            raise TimeoutError(f"inference server not listening after {SERVER_START_TIMEOUT:.0f} s")
+        time.sleep(0.05)
+    try:
+        print("clients   crops/s   p50 ms   p99 ms")
+        for clients in client_counts:
+            results = mp.Queue()
+            workers = [mp.Process(target=_client_worker, args=(socket_path, requests, results))
+                       for _ in range(clients)]
+            start = time.perf_counter()
+            for w in workers:
+                w.start()
+            samples = [s for _ in workers for s in results.get()]
+            for w in workers:
+                w.join()
+            elapsed = time.perf_counter() - start
+            latencies = sorted(lat for lat, _ in samples)
+            crops = sum(count for _, count in samples)
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000
+            print(f"{clients:7d}  {crops / elapsed:8.1f}  {p50:7.1f}  {p99:7.1f}")
+    finally:
+        server.terminate()
+
+
+def _serve_quietly(model_path, socket_path):
+    from inference_server import serve
+
+    try:
+        serve(model_path, socket_path)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    load_test()
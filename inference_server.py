@@ -0,0 +1,221 @@
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from interpreter_pool import MODEL_PATH, load_interpreter
+
+# =============================
+# Protocol
+# =============================
+# server -> client on connect : INFO  (height, width, num_classes, name_len) + model name
+# client -> server            : HELLO (max_crops, name_len) + shared memory name
+# client -> server per request: REQ   (seq, count)   crops already written into shared memory
+# server -> client per request: RESP  (seq, count)   predictions written back into shared memory
+#                                                    count == RESP_ERROR if inference failed
+#
+# Shared memory layout per client: max_crops uint8 crops (height x width x 3, already
+# resized), followed by max_crops float32 rows of num_classes predictions.
+SOCKET_PATH = "/tmp/tomato_infer.sock"
+INFO = struct.Struct("!IIII")
+HELLO = struct.Struct("!II")
+REQ = struct.Struct("!II")
+RESP = struct.Struct("!II")
+RESP_ERROR = 0xFFFFFFFF
+
+BATCH_WINDOW = 0.005   # max time the first request of a batch waits for company
+MAX_BATCH = 16         # most crops per invoke; a batch is invoked with its real crop count
+
+
+def recv_exact(conn, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    got = 0
+    while got < size:
+        n = conn.recv_into(view[got:])
+        if n == 0:
+            return None
+        got += n
+    return bytes(buf)
+
+
+def shm_views(shm, max_crops, height, width, num_classes):
+    """Crop and prediction arrays laid over a client's shared memory block."""
+    crop_bytes = max_crops * height * width * 3
+    crops = np.ndarray((max_crops, height, width, 3), np.uint8, shm.buf[:crop_bytes])
+    preds = np.ndarray((max_crops, num_classes), np.float32,
+                       shm.buf[crop_bytes:crop_bytes + max_crops * num_classes * 4])
+    return crops, preds
+
+
+def shm_size(max_crops, height, width, num_classes):
+    return max_crops * (height * width * 3 + num_classes * 4)
+
+
+class _Request:
+    __slots__ = ("conn", "seq", "count", "crops", "preds", "arrived")
+
+    def __init__(self, conn, seq, count, crops, preds):
+        self.conn = conn
+        self.seq = seq
+        self.count = count
+        self.crops = crops
+        self.preds = preds
+        self.arrived = time.monotonic()
+
+
+# =============================
+# Server
+# =============================
+class InferenceServer:
+    """Single interpreter shared by every client process, fed in coalesced batches."""
+
+    def __init__(self, model_path=MODEL_PATH, socket_path=SOCKET_PATH,
+                 batch_window=BATCH_WINDOW, max_batch=MAX_BATCH, num_threads=4):
+        self.model_name = os.path.basename(model_path)
+        self.socket_path = socket_path
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.interpreter = load_interpreter(model_path, num_threads)
+        inp = self.interpreter.get_input_details()[0]
+        outputs = self.interpreter.get_output_details()
+        if len(outputs) != 1:
+            raise ValueError(f"{self.model_name} has {len(outputs)} outputs; "
+                             "the server only serves single-output models")
+        out = outputs[0]
+        self.input_index = inp["index"]
+        self.output_index = out["index"]
+        self.input_dtype = inp["dtype"]
+        _, self.height, self.width, _ = (int(d) for d in inp["shape"])
+        self.num_classes = int(out["shape"][-1])
+        self.batch_size = 1
+        self.batch_input = np.zeros((max_batch, self.height, self.width, 3), self.input_dtype)
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.crops = 0
+        self._sock = None
+
+    # ---------- batching ----------
+    def _set_batch_size(self, size):
+        # Invoke time grows with every row, so padding to a fixed batch costs a full
+        # inference per empty row; resize+allocate is ~0.1 ms and only happens on change
+        if size == self.batch_size:
+            return
+        self.interpreter.resize_tensor_input(self.input_index, [size, self.height, self.width, 3])
+        self.interpreter.allocate_tensors()
+        self.batch_size = size
+
+    def _run_chunk(self, slots):
+        size = len(slots)
+        self._set_batch_size(size)
+        for k, (req, i) in enumerate(slots):
+            np.copyto(self.batch_input[k], req.crops[i], casting="unsafe")
+        batch_input = self.batch_input[:size]
+        if self.input_dtype == np.float32:
+            batch_input *= np.float32(1.0 / 255.0)
+        self.interpreter.set_tensor(self.input_index, batch_input)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_index)
+        for k, (req, i) in enumerate(slots):
+            req.preds[i] = output[k]
+        self.batches += 1
+        self.crops += len(slots)
+
+    def _run(self, batch):
+        slots = [(req, i) for req in batch for i in range(req.count)]
+        for start in range(0, len(slots), self.max_batch):
+            self._run_chunk(slots[start:start + self.max_batch])
+        self._reply(batch)
+
+    def _reply(self, batch, error=False):
+        for req in batch:
+            try:
+                req.conn.sendall(RESP.pack(req.seq, RESP_ERROR if error else req.count))
+            except OSError:
+                pass   # client went away; its reader thread cleans up
+
+    def _batch_loop(self):
+        while True:
+            first = self.requests.get()
+            batch, pending = [first], first.count
+            deadline = first.arrived + self.batch_window
+            while pending < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    req = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(req)
+                pending += req.count
+            try:
+                self._run(batch)
+            except Exception as e:
+                # One bad batch must not kill the loop and leave every client waiting
+                print(f"⚠️ Inference failed for a batch of {len(batch)} request(s): {e}")
+                self._reply(batch, error=True)
+
+    # ---------- connections ----------
+    def _client_loop(self, conn):
+        shm = None
+        try:
+            name = self.model_name.encode()
+            conn.sendall(INFO.pack(self.height, self.width, self.num_classes, len(name)) + name)
+            hello = recv_exact(conn, HELLO.size)
+            if hello is None:
+                return
+            max_crops, name_len = HELLO.unpack(hello)
+            shm = shared_memory.SharedMemory(name=recv_exact(conn, name_len).decode())
+            # The client owns the block; keep our tracker from unlinking it on exit
+            resource_tracker.unregister(shm._name, "shared_memory")
+            crops, preds = shm_views(shm, max_crops, self.height, self.width, self.num_classes)
+            while True:
+                header = recv_exact(conn, REQ.size)
+                if header is None:
+                    break
+                seq, count = REQ.unpack(header)
+                self.requests.put(_Request(conn, seq, min(count, max_crops), crops, preds))
+        finally:
+            conn.close()
+            if shm is not None:
+                # Views must be dropped before the mapping can close
+                crops = preds = None
+                try:
+                    shm.close()
+                except BufferError:
+                    pass   # a queued request still holds a view; freed with it
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.bind(self.socket_path)
+        self._sock.listen()
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        print(f"✅ Inference server for {self.model_name} on {self.socket_path}")
+        try:
+            while True:
+                conn, _ = self._sock.accept()
+                threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+        finally:
+            self._sock.close()
+            os.unlink(self.socket_path)
+
+
+def serve(model_path=MODEL_PATH, socket_path=SOCKET_PATH, **kwargs):
+    InferenceServer(model_path, socket_path, **kwargs).serve_forever()
+
+
+if __name__ == "__main__":
+    import sys
+
+    try:
+        serve(sys.argv[1] if len(sys.argv) > 1 else MODEL_PATH)
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
@@ -0,0 +1,196 @@
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# tflite_runtime on the Pi, full TensorFlow on a dev box
+try:
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    from tensorflow.lite import Interpreter
+
+MODEL_PATH = "tomato_model_pi.tflite"
+
+# Fused models (convert.py --multi-head) have one output per head, told apart by size
+HEAD_NAMES = {5: "disease", 6: "ripeness"}
+
+
+def load_interpreter(model_path=MODEL_PATH, num_threads=None):
+    """Interpreter with tensors allocated, ready for set_tensor/invoke."""
+    if num_threads is None:
+        interpreter = Interpreter(model_path=model_path)
+    else:
+        interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def output_heads(interpreter):
+    """[(name, tensor index)] per model output; a single-output model gives [(None, index)]."""
+    outputs = interpreter.get_output_details()
+    if len(outputs) == 1:
+        return [(None, outputs[0]["index"])]
+    return [(HEAD_NAMES.get(int(o["shape"][-1]), o["name"]), o["index"]) for o in outputs]
+
+
+# =============================
+# Interpreter slot: one interpreter plus its own input buffers
+# =============================
+class _Slot:
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        inp = interpreter.get_input_details()[0]
+        self.input_index = inp["index"]
+        self.heads = output_heads(interpreter)
+        self.dtype = inp["dtype"]
+        _, self.height, self.width, _ = inp["shape"]
+        self.resized = np.empty((self.height, self.width, 3), np.uint8)
+        self.model_input = np.empty((1, self.height, self.width, 3), self.dtype)
+
+    def classify(self, crop):
+        cv2.resize(crop, (int(self.width), int(self.height)), dst=self.resized)
+        if self.dtype == np.float32:
+            np.copyto(self.model_input[0], self.resized)
+            self.model_input *= np.float32(1.0 / 255.0)
+        else:
+            self.model_input[0] = self.resized
+        self.interpreter.set_tensor(self.input_index, self.model_input)
+        self.interpreter.invoke()
+        # get_tensor returns a copy, safe to hand back after the slot is reused
+        if len(self.heads) == 1:
+            return self.interpreter.get_tensor(self.heads[0][1])[0]
+        return {name: self.interpreter.get_tensor(index)[0] for name, index in self.heads}
+
+
+# =============================
+# Pool
+# =============================
+class InterpreterPool:
+    """K independent interpreters serving crops from a thread pool.
+
+    An Interpreter is not thread-safe, so each worker checks one out for the duration
+    of a single crop. invoke() releases the GIL, so K crops really run in parallel.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, size=2, num_threads=2):
+        self.size = size
+        self.num_threads = num_threads
+        self._slots = queue.Queue()
+        for _ in range(size):
+            self._slots.put(_Slot(load_interpreter(model_path, num_threads)))
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="tflite")
+
+    def _run(self, crop):
+        slot = self._slots.get()
+        try:
+            return slot.classify(crop)
+        finally:
+            self._slots.put(slot)
+
+    def classify(self, crops):
+        """Predictions for crops, in input order.
+
+        Each prediction is the output row, or {head name: row} for a multi-head model.
+        """
+        if len(crops) == 1:
+            return [self._run(crops[0])]
+        return list(self._executor.map(self._run, crops))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================
+# Throughput sweep
+# =============================
+def benchmark(model_path=MODEL_PATH, sizes=(1, 2, 4), threads=(1, 2, 4),
+              crop_counts=(1, 2, 5, 10), frames=20):
+    rng = np.random.default_rng(0)
+    crops = [rng.integers(0, 256, (int(rng.integers(60, 200)), int(rng.integers(60, 200)), 3),
+                          dtype=np.uint8) for _ in range(max(crop_counts))]
+    results = []
+    for size in sizes:
+        for num_threads in threads:
+            with InterpreterPool(model_path, size, num_threads) as pool:
+                pool.classify(crops[:size])   # warm up every interpreter
+                for count in crop_counts:
+                    start = time.perf_counter()
+                    for _ in range(frames):
+                        pool.classify(crops[:count])
+                    elapsed = time.perf_counter() - start
+                    results.append((size, num_threads, count,
+                                    count * frames / elapsed, 1000 * elapsed / frames))
+    return results
+
+
+# =============================
+# Fused multi-head model vs one model per head
+# =============================
+FUSED_MODEL_PATH = "tomato_fused.tflite"
+RIPENESS_MODEL_PATH = "tomato_ripeness.tflite"
+
+
+def _rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _measure_models(model_paths, crops, results):
+    before = _rss_bytes()
+    slots = [_Slot(load_interpreter(path, 1)) for path in model_paths]
+    loaded = _rss_bytes()
+    for slot in slots:
+        slot.classify(crops[0])
+    start = time.perf_counter()
+    for crop in crops:
+        for slot in slots:
+            slot.classify(crop)
+    elapsed = time.perf_counter() - start
+    results.put((1000 * elapsed / len(crops), loaded - before, _rss_bytes() - before))
+
+
+def compare_fused(fused_path=FUSED_MODEL_PATH, separate_paths=(MODEL_PATH, RIPENESS_MODEL_PATH),
+                  count=100):
+    """Per-crop latency and resident memory: one fused invoke vs one invoke per model.
+
+    Each configuration runs in a fresh process so their memory does not mix.
+    """
+    import multiprocessing as mp
+
+    rng = np.random.default_rng(0)
+    crops = [rng.integers(0, 256, (120, 120, 3), dtype=np.uint8) for _ in range(count)]
+    rows = []
+    for name, paths in (("two models", list(separate_paths)), ("fused", [fused_path])):
+        results = mp.Queue()
+        worker = mp.Process(target=_measure_models, args=(paths, crops, results))
+        worker.start()
+        ms, loaded, peak = results.get()
+        worker.join()
+        size = sum(os.path.getsize(path) for path in paths)
+        rows.append((name, ms, size, loaded, peak))
+    return rows
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python interpreter_pool.py          pool size x threads sweep
+    # python interpreter_pool.py --fused  fused model vs two models (convert.py --multi-head)
+    if len(sys.argv) > 1 and sys.argv[1] == "--fused":
+        print("config       ms/crop  model KiB  RSS after load KiB  RSS after run KiB")
+        for name, ms, size, loaded, peak in compare_fused():
+            print(f"{name:11s}  {ms:7.2f}  {size / 1024:9.0f}  {loaded / 1024:18.0f}  "
+                  f"{peak / 1024:17.0f}")
+    else:
+        print(" K  threads  crops   crops/s   ms/frame")
+        for size, num_threads, count, rate, ms in benchmark():
+            print(f"{size:2d}  {num_threads:7d}  {count:5d}  {rate:8.1f}  {ms:9.1f}")
@@ -0,0 +1,240 @@
+import json
+import os
+import time
+
+# =============================
+# Shadow joint state
+# =============================
+# Every commanded angle is kept in memory, so motion code never reads the PCA9685
+# duty-cycle registers back over I2C, and a relaxed servo (duty 0, angle None) still
+# has a known position. The pose is persisted after each move so a restarted script
+# starts from where the arm really is instead of assuming 90 degrees.
+STATE_PATH = "joint_state.json"
+SECONDS_PER_DEGREE = 0.17 / 60   # MG996R-class servo at 5 V, unloaded
+SETTLE_MIN = 0.05                # seconds a servo needs even for a tiny step
+
+
+class JointState:
+    """Single source of truth for servo angles: commands go through it, reads come from it."""
+
+    def __init__(self, servos, path=STATE_PATH, clock=time):
+        self.servos = servos
+        self.path = path
+        self.clock = clock
+        channels = servos.keys() if isinstance(servos, dict) else range(len(servos))
+        self.angles = {ch: None for ch in channels}
+        self.relaxed = set()
+        self.settle_until = {ch: 0.0 for ch in channels}
+        self.others = {}     # persisted channels this instance does not drive; kept on save
+        self.load()
+
+    # ---------- persistence ----------
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable joint state {self.path}: {e}")
+            return
+        for ch, angle in state.get("angles", {}).items():
+            if int(ch) not in self.angles:
+                self.others[int(ch)] = angle
+            elif angle is not None:
+                self.angles[int(ch)] = angle
+                # Not driven by this process yet (pca.deinit() on exit cuts the PWM)
+                self.relaxed.add(int(ch))
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"angles": {**self.others, **self.angles}}, f)
+        os.replace(tmp, self.path)
+
+    # ---------- state ----------
+    def angle(self, ch):
+        """Last commanded angle, also while relaxed; None only if never known."""
+        return self.angles[ch]
+
+    @property
+    def pose(self):
+        return dict(self.angles)
+
+    def tracked(self):
+        """Servo-like views for code that drives servo objects itself (motion_recorder.play):
+        their angle writes go through command()/relax(). Call save() when done."""
+        return {ch: _TrackedServo(self, ch) for ch in self.angles}
+
+    def settle_time(self, ch):
+        return max(0.0, self.settle_until[ch] - self.clock.monotonic())
+
+    def wait_settled(self, channels=None):
+        channels = self.angles if channels is None else channels
+        self.clock.sleep(max((self.settle_time(ch) for ch in channels), default=0.0))
+
+    # ---------- commands ----------
+    def command(self, ch, angle):
+        """Sets the servo and records the angle; the only place servo angles are written."""
+        previous = self.angles[ch]
+        self.servos[ch].angle = angle
+        travel = 180 if previous is None else abs(angle - previous)
+        self.settle_until[ch] = self.clock.monotonic() + max(SETTLE_MIN, travel * SECONDS_PER_DEGREE)
+        self.angles[ch] = angle
+        self.relaxed.discard(ch)
+
+    def relax(self, ch):
+        """Cuts the servo's PWM; the joint is assumed to stay at its last angle."""
+        self.servos[ch].angle = None
+        self.relaxed.add(ch)
+        self.save()
+
+    def move_slow(self, ch, target, speed=0.04):
+        """Steps ch to target one degree per speed seconds, from the shadowed angle."""
+        target = max(0, min(180, int(target)))
+        current = self.angles[ch]
+        if current is None:
+            # Never commanded and nothing persisted: one jump straight to the target
+            # instead of a jump to a guessed 90 followed by a sweep back
+            self.command(ch, target)
+            self.wait_settled([ch])
+            self.save()
+            return
+        start = int(round(current))
+        if start == target:
+            if ch in self.relaxed:
+                self.command(ch, target)
+                self.save()
+            return
+        step = 1 if target > start else -1
+        for angle in range(start + step, target + step, step):
+            self.command(ch, angle)
+            self.clock.sleep(speed)
+        self.save()
+
+
+class _TrackedServo:
+    __slots__ = ("_joints", "_ch")
+
+    def __init__(self, joints, ch):
+        self._joints = joints
+        self._ch = ch
+
+    @property
+    def angle(self):
+        return self._joints.angle(self._ch)
+
+    @angle.setter
+    def angle(self, value):
+        if value is None:
+            self._joints.relax(self._ch)
+        else:
+            self._joints.command(self._ch, value)
+
+
+# =============================
+# I2C reads and wasted travel over simulated restarts + pick cycles
+# =============================
+def _simulate(use_state, cycles=3, path=None):
+    """Each cycle is a script start (fresh PCA9685 object, arm left where it was),
+    go_home() and one pick_and_drop() as in detect_pick.py."""
+    from pick_scheduler import BASE_CH, ELBOW_CH, PITCH_CH, SHOULDER_CH
+    from sim_servo import SimClock, make_servos
+
+    GRIPPER_CH = 5
+    LIMITS = {
+        BASE_CH:     {"neutral": 20,  "min": 10,  "max": 50},
+        PITCH_CH:    {"neutral": 90,  "min": 40,  "max": 120},
+        SHOULDER_CH: {"neutral": 130, "pick": 115},
+        ELBOW_CH:    {"neutral": 65,  "pick": 100},
+        GRIPPER_CH:  {"open": 170,    "close": 20},
+    }
+    channels = [BASE_CH, SHOULDER_CH, ELBOW_CH, PITCH_CH, GRIPPER_CH]
+    # Where the joints physically are; survives restarts and relaxed servos
+    physical = {BASE_CH: 20, SHOULDER_CH: 130, ELBOW_CH: 65, PITCH_CH: 90, GRIPPER_CH: 170}
+    totals = {"reads": 0, "writes": 0, "travel": 0, "needed": 0}
+    clock = SimClock()
+
+    for _ in range(cycles):
+        pca, servos = make_servos(channels)
+
+        def write(ch, angle):
+            servos[ch].angle = angle
+            if angle is not None:
+                totals["travel"] += abs(angle - physical[ch])
+                physical[ch] = angle
+
+        taps = {ch: _Tap(ch, write) for ch in channels}
+        joints = JointState(taps, path, clock) if use_state else None
+
+        def move_slow(ch, target, speed=0.04):
+            totals["needed"] += abs(max(0, min(180, int(target))) - physical[ch])
+            if joints is not None:
+                joints.move_slow(ch, target, speed)
+                return
+            # detect_pick.py before the shadow state
+            current = servos[ch].angle
+            if current is None: current = 90
+            start_angle, target_angle = int(round(current)), int(target)
+            target_angle = max(0, min(180, target_angle))
+            if start_angle == target_angle: return
+            step = 1 if target_angle > start_angle else -1
+            for angle in range(start_angle, target_angle + step, step):
+                write(ch, angle)
+                clock.sleep(speed)
+
+        def relax(ch):
+            if joints is not None:
+                joints.relax(ch)
+            else:
+                write(ch, None)
+
+        # go_home()
+        for ch, key in ((GRIPPER_CH, "open"), (ELBOW_CH, "neutral"), (SHOULDER_CH, "neutral"),
+                        (PITCH_CH, "neutral"), (BASE_CH, "neutral")):
+            move_slow(ch, LIMITS[ch][key])
+        # pick_and_drop()
+        move_slow(BASE_CH, 40)
+        move_slow(SHOULDER_CH, LIMITS[SHOULDER_CH]["pick"])
+        move_slow(ELBOW_CH, LIMITS[ELBOW_CH]["pick"])
+        move_slow(GRIPPER_CH, LIMITS[GRIPPER_CH]["close"], speed=0.02)
+        relax(GRIPPER_CH)
+        move_slow(ELBOW_CH, LIMITS[ELBOW_CH]["neutral"])
+        move_slow(SHOULDER_CH, LIMITS[SHOULDER_CH]["neutral"])
+        move_slow(BASE_CH, LIMITS[BASE_CH]["neutral"])
+        move_slow(GRIPPER_CH, LIMITS[GRIPPER_CH]["open"], speed=0.02)
+
+        totals["reads"] += pca.i2c.reads
+        totals["writes"] += pca.i2c.writes
+    return totals, clock.monotonic()
+
+
+class _Tap:
+    """Simulated servo that counts travel through write(ch, angle) and forbids reads."""
+
+    def __init__(self, ch, write):
+        self._ch = ch
+        self._write = write
+
+    @property
+    def angle(self):
+        raise AssertionError("JointState must not read servo angles back")
+
+    @angle.setter
+    def angle(self, value):
+        self._write(self._ch, value)
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    cycles = 3
+    path = os.path.join(tempfile.mkdtemp(), STATE_PATH)
+    print(f"{cycles} x (script start, go_home, pick_and_drop) on simulated servos")
+    for name, use_state in (("I2C reads", False), ("shadow state", True)):
+        totals, duration = _simulate(use_state, cycles, path)
+        wasted = totals["travel"] - totals["needed"]
+        print(f"{name:12s}: {totals['reads']:4d} I2C reads, {totals['writes']:4d} writes, "
+              f"{totals['travel']:5d} deg travelled, {wasted:4d} deg unnecessary, {duration:6.1f} s")
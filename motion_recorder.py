@@ -0,0 +1,351 @@
+import math
+import struct
+import time
+
+# =============================
+# Recording file format
+# =============================
+# Header : b"TMRC", version, number of channels, then one byte per channel id
+# Record : float32 seconds since recording start, one byte per channel angle
+#          (0-180, RELAXED = servo released / angle None, UNKNOWN = never set while
+#          recording; played back as "hold the current angle")
+# Version 1 files have no UNKNOWN; they still load.
+MAGIC = b"TMRC"
+VERSION = 2
+RELAXED = 255
+UNKNOWN = 254
+HEADER = struct.Struct("<4sBB")
+STAMP = struct.Struct("<f")
+
+# =============================
+# Playback limits
+# =============================
+GRIPPER_CH = 5
+DEFAULT_LIMITS = (60.0, 180.0)            # (deg/s, deg/s^2) for arm joints
+JOINT_LIMITS = {GRIPPER_CH: (120.0, 480.0)}
+PLAYBACK_RATE = 50                        # servo updates per second
+COLLINEAR_TOLERANCE = 1.0                 # degrees off the straight line still "on it"
+SLOW_STEP_DELAY = 0.04                    # old 1 degree / 40 ms replay pace
+
+
+class MotionRecorder:
+    """Keeps the current pose of every channel and snapshots it as waypoints.
+
+    pose holds only channels with a known angle (None = relaxed); seed it with the
+    arm's pose (e.g. JointState.pose) so untouched joints are recorded where they are.
+    """
+
+    def __init__(self, channels, pose=None):
+        self.channels = list(channels)
+        self.pose = {ch: angle for ch, angle in (pose or {}).items()
+                     if ch in self.channels and angle is not None}
+        self.waypoints = []
+        self._start = None
+
+    def update(self, channel, angle):
+        self.pose[channel] = None if angle is None else int(round(angle))
+
+    def mark(self):
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        self.waypoints.append((now - self._start, dict(self.pose)))
+        return len(self.waypoints)
+
+    def save(self, path):
+        save_waypoints(path, self.channels, self.waypoints)
+
+
+def save_waypoints(path, channels, waypoints):
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(channels)))
+        f.write(bytes(channels))
+        for stamp, pose in waypoints:
+            f.write(STAMP.pack(stamp))
+            f.write(bytes(UNKNOWN if ch not in pose else RELAXED if pose[ch] is None else pose[ch]
+                          for ch in channels))
+
+
+def load_waypoints(path):
+    """(channels, [(seconds, {channel: angle or None})]) from a recording.
+
+    None is relaxed; channels unknown at a waypoint are left out of its pose.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version not in (1, VERSION):
+        raise ValueError(f"{path} is not a motion recording")
+    offset = HEADER.size
+    channels = list(data[offset:offset + count])
+    offset += count
+    waypoints = []
+    while offset < len(data):
+        (stamp,) = STAMP.unpack_from(data, offset)
+        offset += STAMP.size
+        angles = data[offset:offset + count]
+        offset += count
+        waypoints.append((stamp, {ch: None if a == RELAXED else a
+                                  for ch, a in zip(channels, angles) if a != UNKNOWN}))
+    return channels, waypoints
+
+
+def resolve(poses, current=None):
+    """Poses over one set of channels: a channel unknown at a waypoint holds its angle
+    from the previous waypoint, or from current (None = unknown) before the first.
+    A channel unknown there too takes its first recorded angle; channels never known
+    at all are left out, so playback does not touch them."""
+    channels = sorted({ch for pose in poses for ch in pose})
+    first = {}
+    for pose in reversed(poses):
+        first.update(pose)
+    last = {ch: first[ch] if current is None or current.get(ch) is None else current[ch]
+            for ch in channels}
+    resolved = []
+    for pose in poses:
+        last = dict(last)
+        last.update(pose)
+        resolved.append(last)
+    return resolved
+
+
+# =============================
+# Waypoint pruning
+# =============================
+def _same_relaxed(*poses):
+    return all((p[ch] is None) == (poses[0][ch] is None) for p in poses for ch in poses[0])
+
+
+def _on_segment(prev, mid, nxt):
+    """mid lies on the joint-space line prev -> nxt, between them."""
+    t_values = []
+    for ch in prev:
+        if prev[ch] is None:
+            continue
+        span = nxt[ch] - prev[ch]
+        if span == 0:
+            if abs(mid[ch] - prev[ch]) > COLLINEAR_TOLERANCE:
+                return False
+            continue
+        t_values.append((mid[ch] - prev[ch]) / span)
+    if not t_values:
+        return True
+    t = sum(t_values) / len(t_values)
+    if t < 0 or t > 1:
+        return False
+    return all(prev[ch] is None or abs(prev[ch] + t * (nxt[ch] - prev[ch]) - mid[ch]) <= COLLINEAR_TOLERANCE
+               for ch in prev)
+
+
+def prune(poses):
+    """Drops repeated poses and intermediate poses on a straight joint-space line.
+
+    Relax/engage changes are always kept, they are actions rather than motion.
+    """
+    kept = []
+    for pose in poses:
+        if kept and pose == kept[-1]:
+            continue
+        if (len(kept) >= 2 and _same_relaxed(kept[-2], kept[-1], pose)
+                and _on_segment(kept[-2], kept[-1], pose)):
+            kept[-1] = pose
+            continue
+        kept.append(pose)
+    return kept
+
+
+# =============================
+# Per-segment retiming (rest to rest at every kept waypoint)
+# =============================
+def _limits(ch):
+    return JOINT_LIMITS.get(ch, DEFAULT_LIMITS)
+
+
+def segment_profile(start, end):
+    """(duration, V, A) of the fastest rest-to-rest straight move start -> end.
+
+    All joints follow one normalised trapezoid s(t) in [0, 1]; V and A are the largest
+    s' and s'' every joint's velocity and acceleration limit allows.
+    """
+    V = A = math.inf
+    for ch in start:
+        if start[ch] is None or end[ch] is None:
+            continue
+        dist = abs(end[ch] - start[ch])
+        if dist == 0:
+            continue
+        vmax, amax = _limits(ch)
+        V = min(V, vmax / dist)
+        A = min(A, amax / dist)
+    if V == math.inf:
+        return 0.0, V, A
+    if V * V / A >= 1.0:        # never reaches cruise speed: triangle profile
+        return 2.0 * math.sqrt(1.0 / A), math.sqrt(A), A
+    return 1.0 / V + V / A, V, A
+
+
+def _s_at(t, duration, V, A):
+    if duration == 0:
+        return 1.0
+    ramp = V / A
+    if t <= 0:
+        return 0.0
+    if t >= duration:
+        return 1.0
+    if t < ramp:
+        return 0.5 * A * t * t
+    if t > duration - ramp:
+        left = duration - t
+        return 1.0 - 0.5 * A * left * left
+    return 0.5 * A * ramp * ramp + V * (t - ramp)
+
+
+def retime(poses):
+    """[(duration, V, A, start, end)]: each segment is its own fastest rest-to-rest move.
+
+    This is not a time-optimal trajectory through the waypoints: the arm stops at every
+    waypoint that prune() keeps. Collinear waypoints are pruned first, so the stops
+    only happen at real changes of direction.
+    """
+    segments = []
+    for start, end in zip(poses, poses[1:]):
+        duration, V, A = segment_profile(start, end)
+        segments.append((duration, V, A, start, end))
+    return segments
+
+
+def retimed_duration(poses):
+    return sum(seg[0] for seg in retime(prune(poses)))
+
+
+def slow_duration(poses, delay=SLOW_STEP_DELAY):
+    """Duration of replaying poses one joint at a time at 1 degree per delay."""
+    total = 0.0
+    for start, end in zip(poses, poses[1:]):
+        for ch in start:
+            if start[ch] is not None and end[ch] is not None:
+                total += abs(end[ch] - start[ch]) * delay
+    return total
+
+
+# =============================
+# Playback
+# =============================
+def _apply(servos, pose, last):
+    for ch, angle in pose.items():
+        if angle is None:
+            if last.get(ch, 0) is not None:
+                servos[ch].angle = None
+        elif last.get(ch) is None or int(round(angle)) != int(round(last[ch])):
+            servos[ch].angle = int(round(angle))
+    return dict(pose)
+
+
+def play(poses, servos, clock=time, rate=PLAYBACK_RATE, current=None):
+    """Replays poses on servos, each segment as a synchronised rest-to-rest trapezoid.
+
+    All joints start and stop together on every segment and the arm halts briefly at
+    each pruned waypoint (see retime()).
+
+    current is the pose the arm is in now (None = unknown); known joints are eased into
+    the first waypoint instead of jumping there, and hold there through waypoints that
+    did not record them (see resolve()).
+    """
+    poses = resolve(poses, current)
+    if current is not None and poses:
+        first = poses[0]
+        poses = [{ch: first[ch] if current.get(ch) is None else current[ch] for ch in first}] + list(poses)
+    poses = prune(poses)
+    if not poses:
+        return 0.0
+    start_time = clock.monotonic()
+    last = _apply(servos, poses[0], {})
+    dt = 1.0 / rate
+    for duration, V, A, start, end in retime(poses):
+        t = 0.0
+        while t < duration:
+            clock.sleep(min(dt, duration - t))
+            t = min(duration, t + dt)
+            s = _s_at(t, duration, V, A)
+            pose = {ch: None if start[ch] is None or end[ch] is None
+                    else start[ch] + (end[ch] - start[ch]) * s for ch in start}
+            last = _apply(servos, pose, last)
+        last = _apply(servos, end, last)
+    return clock.monotonic() - start_time
+
+
+def play_slow(poses, servos, clock=time, delay=SLOW_STEP_DELAY):
+    """Old replay: every waypoint, one joint at a time, 1 degree per delay."""
+    poses = resolve(poses)
+    if not poses:
+        return 0.0
+    start_time = clock.monotonic()
+    last = _apply(servos, poses[0], {})
+    for pose in poses[1:]:
+        for ch, target in pose.items():
+            if target is None or last[ch] is None:
+                servos[ch].angle = target
+                last[ch] = target
+                continue
+            step = 1 if target > last[ch] else -1
+            for angle in range(last[ch] + step, target + step, step):
+                servos[ch].angle = angle
+                clock.sleep(delay)
+            last[ch] = target
+    return clock.monotonic() - start_time
+
+
+# =============================
+# Retiming report on the simulated servo backend
+# =============================
+def _demo_teach():
+    """Pick/drop as an operator would teach it: nudging one joint a few degrees at a time."""
+    from pick_scheduler import BASE_CH, ELBOW_CH, PITCH_CH, SHOULDER_CH
+
+    recorder = MotionRecorder([BASE_CH, SHOULDER_CH, ELBOW_CH, PITCH_CH, 4, GRIPPER_CH])
+    home = {BASE_CH: 20, SHOULDER_CH: 130, ELBOW_CH: 65, PITCH_CH: 90, 4: 90, GRIPPER_CH: 170}
+    for ch, angle in home.items():
+        recorder.update(ch, angle)
+    recorder.mark()
+
+    def nudge(ch, target, step):
+        current = recorder.pose[ch]
+        while current != target:
+            current += max(-step, min(step, target - current))
+            recorder.update(ch, current)
+            recorder.mark()
+
+    nudge(BASE_CH, 40, 5)
+    nudge(SHOULDER_CH, 115, 5)
+    nudge(ELBOW_CH, 100, 5)
+    nudge(GRIPPER_CH, 20, 30)
+    recorder.mark()                      # operator pressed "w" twice
+    recorder.update(GRIPPER_CH, None)    # relax gripper while holding
+    recorder.mark()
+    nudge(ELBOW_CH, 65, 5)
+    nudge(SHOULDER_CH, 130, 5)
+    nudge(BASE_CH, 20, 5)
+    recorder.update(GRIPPER_CH, 170)
+    recorder.mark()
+    return recorder
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from sim_servo import SimClock, make_servos
+
+    recorder = _demo_teach()
+    path = os.path.join(tempfile.gettempdir(), "demo_pick.tmrc")
+    recorder.save(path)
+    channels, waypoints = load_waypoints(path)
+    poses = [pose for _, pose in waypoints]
+    print(f"Recorded {len(poses)} waypoints, {os.path.getsize(path)} bytes")
+    print(f"Pruned to {len(prune(poses))} waypoints")
+
+    for name, player in (("original", play_slow), ("retimed", play)):
+        pca, servos = make_servos(channels)
+        clock = SimClock()
+        duration = player(poses, servos, clock)
+        print(f"{name:9s}: {duration:6.2f} s, {pca.i2c.writes} I2C writes")
@@ -2,6 +2,8 @@ import time
 import board
 import busio
 from adafruit_pca9685 import PCA9685
+from joint_state import JointState
+from servo_duty import SAFE_RANGE, DutyServo, safe_angle_to_duty
 
 # =============================
 # PCA9685 Initialization
@@ -13,10 +15,13 @@ pca.frequency = 50   # Standard servo frequency
 # =============================
 # Servo angle function
 # =============================
+# Commands go through the shared joint state so the next script knows the pose
+joints = JointState({ch: DutyServo(pca.channels[ch], safe_angle_to_duty) for ch in range(6)})
+
 def set_servo_angle(channel, angle):
-    angle = max(30, min(150, angle))   # safe limits
-    pulse = int(4096 * (0.5 + angle / 180 * 2.0) / 20)
-    pca.channels[channel].duty_cycle = pulse
+    # Clamped to the 30-150 safe limits, see servo_duty.safe_angle_to_duty
+    joints.command(channel, max(SAFE_RANGE[0], min(SAFE_RANGE[1], angle)))
+    joints.save()
 
 # =============================
 # Servo channels
@@ -0,0 +1,285 @@
+import math
+from collections import namedtuple
+
+# =============================
+# Joint channels (same wiring as detect_pick.py)
+# =============================
+BASE_CH, SHOULDER_CH, ELBOW_CH, PITCH_CH, GRIPPER_CH = 0, 1, 2, 3, 5
+JOINTS = (BASE_CH, SHOULDER_CH, ELBOW_CH)
+JOINT_WEIGHTS = {BASE_CH: 1.0, SHOULDER_CH: 1.0, ELBOW_CH: 1.0}
+
+# =============================
+# Pixel -> joint calibration
+# =============================
+# detect_pick.py's fixed pick pose; every target is picked there until the spans below
+# have been measured on the arm and CALIBRATED is set.
+PICK_POSE = {BASE_CH: 40, SHOULDER_CH: 115, ELBOW_CH: 100}
+# Linear fit over the camera view: (angle at left/top edge, angle at right/bottom edge).
+# PLACEHOLDERS, not measured: centred on PICK_POSE only so the simulation below has
+# spread-out poses to order. Replace with angles read off the real arm at the frame
+# edges before setting CALIBRATED = True.
+BASE_SPAN = (30, 50)
+SHOULDER_SPAN = (120, 110)
+ELBOW_SPAN = (95, 105)
+CALIBRATED = False
+
+HOME_POSE = {BASE_CH: 20, SHOULDER_CH: 130, ELBOW_CH: 65}
+# Where the arm releases the fruit. A None entry keeps that joint where the pick left it,
+# e.g. DROP_POSE[BASE_CH] = None for a trough running under the base sweep.
+DROP_POSE = dict(HOME_POSE)
+
+MATCH_RADIUS = 40          # px a fruit may drift between frames and still be the same target
+TWO_OPT_MAX_TARGETS = 12   # beyond this nearest-neighbour order is used as is
+
+Target = namedtuple("Target", "x y w h confidence pose")
+
+
+def _lerp(span, t):
+    t = max(0.0, min(1.0, t))
+    return int(round(span[0] + (span[1] - span[0]) * t))
+
+
+def target_pose(cx, cy, frame_w, frame_h, calibrated=None):
+    """Joint angles needed to reach a fruit centred at pixel (cx, cy); PICK_POSE while
+    the spans are uncalibrated (calibrated=None follows CALIBRATED)."""
+    if not (CALIBRATED if calibrated is None else calibrated):
+        return dict(PICK_POSE)
+    return {
+        BASE_CH: _lerp(BASE_SPAN, cx / float(frame_w)),
+        SHOULDER_CH: _lerp(SHOULDER_SPAN, cy / float(frame_h)),
+        ELBOW_CH: _lerp(ELBOW_SPAN, cy / float(frame_h)),
+    }
+
+
+def make_target(box, confidence, frame_shape, calibrated=None):
+    x, y, w, h = box
+    frame_h, frame_w = frame_shape[:2]
+    return Target(x, y, w, h, confidence,
+                  target_pose(x + w // 2, y + h // 2, frame_w, frame_h, calibrated))
+
+
+def center(target):
+    return target.x + target.w // 2, target.y + target.h // 2
+
+
+# =============================
+# Travel cost
+# =============================
+def travel(a, b):
+    """Weighted degrees the joints turn going from pose a to pose b."""
+    return sum(JOINT_WEIGHTS[j] * abs(a[j] - b[j]) for j in JOINTS)
+
+
+def resolve_drop(pose, drop_pose=DROP_POSE):
+    return {j: pose[j] if drop_pose[j] is None else drop_pose[j] for j in JOINTS}
+
+
+def leg_cost(prev_pose, next_pose, drop_pose=DROP_POSE):
+    """Travel from one pick, via its drop, to the next pick."""
+    drop = resolve_drop(prev_pose, drop_pose)
+    return travel(prev_pose, drop) + travel(drop, next_pose)
+
+
+def tour_cost(order, targets, start_pose=HOME_POSE, drop_pose=DROP_POSE):
+    """Total travel of picking targets in the given order, ending at the last drop."""
+    if not order:
+        return 0.0
+    cost = travel(start_pose, targets[order[0]].pose)
+    for prev, nxt in zip(order, order[1:]):
+        cost += leg_cost(targets[prev].pose, targets[nxt].pose, drop_pose)
+    last = targets[order[-1]].pose
+    return cost + travel(last, resolve_drop(last, drop_pose))
+
+
+# =============================
+# Ordering: nearest neighbour + 2-opt
+# =============================
+def _nearest_neighbour(targets, start_pose, drop_pose):
+    remaining = list(range(len(targets)))
+    order = []
+    pose = None
+    while remaining:
+        if pose is None:
+            best = min(remaining, key=lambda i: travel(start_pose, targets[i].pose))
+        else:
+            best = min(remaining, key=lambda i: leg_cost(pose, targets[i].pose, drop_pose))
+        order.append(best)
+        remaining.remove(best)
+        pose = targets[best].pose
+    return order
+
+
+def _two_opt(order, targets, start_pose, drop_pose):
+    best_cost = tour_cost(order, targets, start_pose, drop_pose)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for k in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:k + 1][::-1] + order[k + 1:]
+                cost = tour_cost(candidate, targets, start_pose, drop_pose)
+                if cost < best_cost - 1e-9:
+                    order, best_cost, improved = candidate, cost, True
+    return order
+
+
+def order_targets(targets, start_pose=HOME_POSE, drop_pose=DROP_POSE):
+    """Indices of targets in the pick order that minimises total joint travel."""
+    indices = list(range(len(targets)))
+    if len(targets) < 2 or all(t.pose == targets[0].pose for t in targets):
+        # Uncalibrated, every target is picked at PICK_POSE: any order costs the same
+        return indices
+    if all(drop_pose[j] is not None for j in JOINTS):
+        # A fixed drop makes every leg drop -> pick -> drop whatever the order, so only
+        # the first pick, reached from start_pose instead of the drop, can save travel.
+        # With the drop at start_pose (the default) not even that.
+        first = min(indices, key=lambda i: travel(start_pose, targets[i].pose)
+                    - travel(drop_pose, targets[i].pose))
+        return [first] + indices[:first] + indices[first + 1:]
+    order = _nearest_neighbour(targets, start_pose, drop_pose)
+    if len(order) <= TWO_OPT_MAX_TARGETS:
+        order = _two_opt(order, targets, start_pose, drop_pose)
+    return order
+
+
+# =============================
+# Pick queue
+# =============================
+class PickQueue:
+    """Healthy targets from one frame, handed out in travel-optimal order.
+
+    Every target after the first is re-validated against a fresh frame: only the
+    blob nearest its last known centre is re-classified, not the whole scene.
+    """
+
+    def __init__(self, targets, start_pose=HOME_POSE, drop_pose=DROP_POSE):
+        self.targets = [targets[i] for i in order_targets(targets, start_pose, drop_pose)]
+        self.drop_pose = drop_pose
+        self.picked = 0
+        self.lost = 0
+
+    def __len__(self):
+        return len(self.targets)
+
+    def pop(self):
+        return self.targets.pop(0) if self.targets else None
+
+    def revalidate(self, target, boxes, classify, frame_shape, min_confidence):
+        """Finds target among fresh boxes and re-classifies just that crop.
+
+        classify(box) -> (is_healthy, confidence). Returns the updated Target, or None
+        when the fruit moved out of reach or no longer passes.
+        """
+        tx, ty = center(target)
+        best, best_dist = None, MATCH_RADIUS
+        for box in boxes:
+            x, y, w, h = box
+            dist = math.hypot(x + w // 2 - tx, y + h // 2 - ty)
+            if dist <= best_dist:
+                best, best_dist = box, dist
+        if best is None:
+            self.lost += 1
+            return None
+        healthy, confidence = classify(best)
+        if not healthy or confidence < min_confidence:
+            self.lost += 1
+            return None
+        return make_target(best, confidence, frame_shape)
+
+
+def pick_moves(pose, drop_pose=DROP_POSE):
+    """(channel, angle) moves of one pick-and-drop cycle, in execution order."""
+    drop = resolve_drop(pose, drop_pose)
+    return [
+        (BASE_CH, pose[BASE_CH]),
+        (SHOULDER_CH, pose[SHOULDER_CH]),
+        (ELBOW_CH, pose[ELBOW_CH]),
+        (GRIPPER_CH, "close"),
+        (ELBOW_CH, drop[ELBOW_CH]),
+        (SHOULDER_CH, drop[SHOULDER_CH]),
+        (BASE_CH, drop[BASE_CH]),
+        (GRIPPER_CH, "open"),
+    ]
+
+
+# =============================
+# Simulated scene: picks per minute
+# =============================
+SIM_STEP_S = 0.04        # move_slow default: 1 degree every 40 ms
+SIM_GRIPPER_S = 150 * 0.02 + 1.0   # close sweep + hold, then open sweep is counted the same
+SIM_SEGMENT_S = 0.015    # HSV mask + contours on one 640x480 frame
+SIM_INFER_S = 0.060      # one 224x224 crop through the TFLite model on the Pi
+
+
+def _simulate(num_fruits, healthy_ratio, drop_pose, use_queue, seed):
+    import random
+
+    rng = random.Random(seed)
+    frame_w, frame_h = 640, 480
+    fruits = []
+    for _ in range(num_fruits):
+        box = (rng.randint(0, frame_w - 80), rng.randint(0, frame_h - 80), 60, 60)
+        fruits.append((box, rng.random() < healthy_ratio))
+    # Placeholder spans: the simulation measures ordering, not reach
+    healthy = [make_target(box, 0.9, (frame_h, frame_w), calibrated=True) for box, ok in fruits if ok]
+
+    elapsed, picks, pose = 0.0, 0, dict(HOME_POSE)
+
+    def run_pick(target):
+        nonlocal elapsed
+        for channel, angle in pick_moves(target.pose, drop_pose):
+            if channel == GRIPPER_CH:
+                elapsed += SIM_GRIPPER_S if angle == "close" else 150 * 0.02
+                continue
+            elapsed += abs(pose[channel] - angle) * SIM_STEP_S
+            pose[channel] = angle
+
+    if use_queue:
+        # One full scan, then cheap re-validation of each queued target
+        elapsed += SIM_SEGMENT_S + SIM_INFER_S * len(fruits)
+        queue = PickQueue(healthy, dict(pose), drop_pose)
+        first = True
+        while len(queue):
+            target = queue.pop()
+            if not first:
+                elapsed += SIM_SEGMENT_S + SIM_INFER_S
+            run_pick(target)
+            picks += 1
+            first = False
+    else:
+        # Old behaviour: classify contours in findContours order, pick the first
+        # healthy one, then rescan the whole scene
+        remaining = list(fruits)
+        rng.shuffle(remaining)
+        while any(ok for _, ok in remaining):
+            elapsed += SIM_SEGMENT_S
+            for i, (box, ok) in enumerate(remaining):
+                elapsed += SIM_INFER_S
+                if ok:
+                    run_pick(make_target(box, 0.9, (frame_h, frame_w), calibrated=True))
+                    picks += 1
+                    del remaining[i]
+                    break
+    return picks, elapsed
+
+
+def simulate_scene(num_fruits=6, healthy_ratio=0.7, drop_pose=DROP_POSE, trials=20):
+    rows = []
+    for use_queue in (False, True):
+        total_picks, total_time = 0, 0.0
+        for seed in range(trials):
+            picks, elapsed = _simulate(num_fruits, healthy_ratio, drop_pose, use_queue, seed)
+            total_picks += picks
+            total_time += elapsed
+        rows.append((use_queue, 60.0 * total_picks / total_time if total_time else 0.0))
+    return rows
+
+
+if __name__ == "__main__":
+    trough = dict(DROP_POSE)
+    trough[BASE_CH] = None
+    for name, drop in (("bin at home pose", DROP_POSE), ("trough under base sweep", trough)):
+        print(f"--- {name} ---")
+        for use_queue, ppm in simulate_scene(drop_pose=drop):
+            label = "ordered queue + revalidate" if use_queue else "first contour + rescan"
+            print(f"{label:28s}: {ppm:5.2f} picks/min")
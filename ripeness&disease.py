@@ -1,35 +1,73 @@
+import os
+
 import cv2
 import numpy as np
+from capture import open_capture
+from frame_arena import FrameProcessor
+from governor import LoadGovernor
+from cascade import FAST_MODEL_PATH, CascadeClassifier, load_band
+from dataset_capture import DatasetCapture
+from inference_client import open_classifier
+from ripeness_stages import STAGES
+from temporal_vote import SequentialVoter
 
 # =============================
-# Load TFLite model
-# =============================
-from tflite_runtime.interpreter import Interpreter
-print("✅ Using tflite_runtime (Raspberry Pi 5)")
-
-# =============================
-# Initialize TFLite interpreter
+# Initialize TFLite classifier
 # =============================
+# Shared inference server when one is running (inference_server.py), otherwise a
+# local pool classifying the crops of a frame in parallel
 MODEL_PATH = "tomato_model_pi.tflite"  
-interpreter = Interpreter(model_path=MODEL_PATH)
-interpreter.allocate_tensors()
-
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
+# Fused ripeness + disease model (convert.py --multi-head): both heads from one invoke
+FUSED_MODEL_PATH = "tomato_fused.tflite"
+if os.path.exists(FUSED_MODEL_PATH):
+    MODEL_PATH = FUSED_MODEL_PATH
+POOL_SIZE = 2
+POOL_THREADS = 2
+classifier = open_classifier(MODEL_PATH, size=POOL_SIZE, num_threads=POOL_THREADS)
+
+# With the quantized model from convert.py --small and a band measured by
+# `python cascade.py IMAGE_DIR`, crops go through the fast model first and only the ones
+# it is unsure about reach the full model. Not combined with the fused model: the fast
+# model has no ripeness head.
+ESCALATE_BAND = load_band()
+if (os.path.exists(FAST_MODEL_PATH) and ESCALATE_BAND is not None
+        and MODEL_PATH != FUSED_MODEL_PATH):
+    fast = open_classifier(FAST_MODEL_PATH, size=POOL_SIZE, num_threads=POOL_THREADS)
+    classifier = CascadeClassifier(fast, classifier, ESCALATE_BAND)
 
 print("✅ TFLite model loaded")
 
 HEALTHY_CLASS_INDEX = 0  # "Healthy Tomato"
 
+# Set to a folder to collect crops + predictions for retraining (written in the background)
+DATASET_DIR = None
+dataset = DatasetCapture(DATASET_DIR) if DATASET_DIR else None
+
 # =============================
 # Open webcam
 # =============================
-cap = cv2.VideoCapture(0)
+CAMERA_SOURCE = 0   # "bus" to share the camera via frame_bus.py
+cap = open_capture(CAMERA_SOURCE)
 
 if not cap.isOpened():
     print("❌ Camera not opened")
     exit()
 
+# Segmentation and crop buffers are allocated once and reused every frame
+processor = FrameProcessor()
+
+# Fruits are followed across frames by temporal_vote.py's box matching. A fruit's
+# prediction is reused for REUSE_FRAMES processed frames, so the classifier (both cascade
+# tiers) only sees new fruits and expired ones, not every crop of every frame.
+REUSE_FRAMES = 10
+tracker = SequentialVoter()
+cached = {}        # track id -> (frame number classified, prediction)
+frame_number = 0
+
+TARGET_FPS = 15
+governor = LoadGovernor(TARGET_FPS)
+results = []
+
 print("✅ Ripe + Healthy/Unhealthy Detection Started (Press Q to quit)")
 
 while True:
@@ -37,76 +75,75 @@ while True:
     if not ret:
         break
 
-    # =============================
-    # Ripe detection (HSV)
-    # =============================
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-    # Red color ranges
-    lower_red1 = np.array([0, 120, 70])
-    upper_red1 = np.array([10, 255, 255])
-    lower_red2 = np.array([170, 120, 70])
-    upper_red2 = np.array([180, 255, 255])
-
-    mask_red = cv2.inRange(hsv, lower_red1, upper_red1) + \
-               cv2.inRange(hsv, lower_red2, upper_red2)
-
-    kernel = np.ones((5, 5), np.uint8)
-    mask_red = cv2.morphologyEx(mask_red, cv2.MORPH_OPEN, kernel)
-    mask_red = cv2.morphologyEx(mask_red, cv2.MORPH_DILATE, kernel)
-
-    contours, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if area < 1000:  # ignore small contours
-            continue
-
-        x, y, w, h = cv2.boundingRect(cnt)
-        tomato_crop = frame[y:y+h, x:x+w]
-
-        if tomato_crop.size == 0:
-            continue
+    # Busy scenes shed work (fewer crops, coarser mask, skipped frames) to hold the frame rate
+    if governor.should_process():
+        governor.begin()
 
         # =============================
-        # Preprocess for TFLite
+        # Ripe detection (HSV) into preallocated buffers
         # =============================
-        img = cv2.resize(tomato_crop, (224, 224))
-        img = img.astype(np.float32) / 255.0
-        img = np.expand_dims(img, axis=0)
-
-        # Set input tensor
-        interpreter.set_tensor(input_details[0]['index'], img)
-
-        # Run inference
-        interpreter.invoke()
-
-        # Get output
-        prediction = interpreter.get_tensor(output_details[0]['index'])[0]
-        class_idx = np.argmax(prediction)
-        confidence = prediction[class_idx] * 100
+        boxes = [(x, y, w, h) for x, y, w, h in
+                 processor.boxes(frame, scale=governor.settings["seg_scale"]) if w > 0 and h > 0]
+        boxes = governor.select(boxes)
+        crops = [frame[y:y+h, x:x+w] for x, y, w, h in boxes]
 
         # =============================
-        # Healthy vs Unhealthy logic
+        # Classify new and expired fruits of this frame in parallel
         # =============================
-        if class_idx == HEALTHY_CLASS_INDEX and confidence >= 60:
-            label = "Healthy"
-            color = (0, 255, 0)
-        elif class_idx != HEALTHY_CLASS_INDEX and confidence >= 70:
-            label = "Unhealthy"
-            color = (0, 0, 255)
-        else:
-            label = "Healthy"
-            color = (0, 255, 0)
+        frame_number += 1
+        tracks = tracker.update(boxes)
+        stale = [i for i, track in enumerate(tracks)
+                 if track.id not in cached or frame_number - cached[track.id][0] >= REUSE_FRAMES]
+        for i, prediction in zip(stale, classifier.classify([crops[i] for i in stale])):
+            cached[tracks[i].id] = (frame_number, prediction)
+        live = {track.id for track in tracker.tracks}
+        cached = {track_id: entry for track_id, entry in cached.items() if track_id in live}
+        predictions = [cached[track.id][1] for track in tracks]
+
+        # A fused model returns {"ripeness": ..., "disease": ...} per crop
+        stages = ["Ripe"] * len(predictions)
+        for i, prediction in enumerate(predictions):
+            if isinstance(prediction, dict):
+                stages[i] = STAGES[int(np.argmax(prediction["ripeness"]))][0]
+                predictions[i] = prediction["disease"]
+
+        # Hand freshly classified crops to the dataset workers before anything is drawn
+        if dataset:
+            for i in stale:
+                dataset.submit(frame, boxes[i], predictions[i])
+
+        results = []
+        for box, stage, prediction in zip(boxes, stages, predictions):
+            class_idx = np.argmax(prediction)
+            confidence = prediction[class_idx] * 100
+
+            # =============================
+            # Healthy vs Unhealthy logic
+            # =============================
+            if class_idx == HEALTHY_CLASS_INDEX and confidence >= 60:
+                label = "Healthy"
+                color = (0, 255, 0)
+            elif class_idx != HEALTHY_CLASS_INDEX and confidence >= 70:
+                label = "Unhealthy"
+                color = (0, 0, 255)
+            else:
+                label = "Healthy"
+                color = (0, 255, 0)
+            results.append((box, stage, label, color))
+
+        governor.end()
 
-        # =============================
-        # Draw results
-        # =============================
+    # =============================
+    # Draw results (skipped frames reuse the last ones)
+    # =============================
+    for (x, y, w, h), stage, label, color in results:
         cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-        cv2.putText(frame, "Ripe", (x, y - 30),
+        cv2.putText(frame, stage, (x, y - 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         cv2.putText(frame, label, (x, y - 10),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    cv2.putText(frame, governor.describe(), (10, 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
 
     cv2.imshow("Ripe Tomato + Health Status (TFLite)", frame)
 
@@ -114,5 +151,8 @@ while True:
         break
 
 cap.release()
+classifier.close()
+if dataset:
+    dataset.close()
 cv2.destroyAllWindows()
 
@@ -1,51 +1,33 @@
 import cv2
-import numpy as np
+from capture import open_capture
+from ripeness_stages import STAGE_COLORS, RipenessClassifier
 
-cap = cv2.VideoCapture(0)
+CAMERA_SOURCE = 0   # "bus" to share the camera via frame_bus.py
+cap = open_capture(CAMERA_SOURCE)
 
 if not cap.isOpened():
     print("❌ Camera not opened")
     exit()
 
-print("✅ Showing ONLY RIPE tomatoes (Press Q to quit)")
+classifier = RipenessClassifier()
+
+print("✅ Showing tomato ripeness stages (Press Q to quit)")
 
 while True:
     ret, frame = cap.read()
     if not ret:
         break
 
-    # Convert to HSV
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-    # =========================
-    # Ripe tomato color (RED)
-    # =========================
-    lower_red1 = np.array([0, 120, 70])
-    upper_red1 = np.array([10, 255, 255])
-    lower_red2 = np.array([170, 120, 70])
-    upper_red2 = np.array([180, 255, 255])
-
-    mask_red = cv2.inRange(hsv, lower_red1, upper_red1) + cv2.inRange(hsv, lower_red2, upper_red2)
-
-    # Reduce noise
-    kernel = np.ones((5, 5), np.uint8)
-    mask_red = cv2.morphologyEx(mask_red, cv2.MORPH_OPEN, kernel)
-    mask_red = cv2.morphologyEx(mask_red, cv2.MORPH_DILATE, kernel)
-
     # =========================
-    # Find ripe tomatoes
+    # Ripeness stage per tomato (one hue lookup per pixel, see ripeness_stages.py)
     # =========================
-    contours, _ = cv2.findContours(mask_red, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if area > 1000:  # adjust if needed
-            x, y, w, h = cv2.boundingRect(cnt)
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(frame, "Ripe", (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+    for x, y, w, h, stage, share, _ in classifier.fruits(frame):  # area > 1000
+        color = STAGE_COLORS[stage]
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+        cv2.putText(frame, f"{stage} {share * 100:.0f}%", (x, y - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
 
-    cv2.imshow("Ripe Tomato Detection", frame)
+    cv2.imshow("Tomato Ripeness Stages", frame)
 
     if cv2.waitKey(1) & 0xFF == ord('q'):
         break
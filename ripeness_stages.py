@@ -0,0 +1,208 @@
+import time
+
+import cv2
+import numpy as np
+
+from frame_arena import KERNEL, MIN_AREA
+
+# =============================
+# Pixel colour classes (one hue lookup per pixel)
+# =============================
+BACKGROUND, GREEN, YELLOW, ORANGE, RED = range(5)
+NUM_LABELS = 5
+GATE_LOW = np.array([0, 80, 60], np.uint8)      # dimmer / greyer pixels are background
+GATE_HIGH = np.array([255, 255, 255], np.uint8)
+
+HUE_LUT = np.zeros(256, np.uint8)   # OpenCV hue is 0..179
+HUE_LUT[0:11] = RED
+HUE_LUT[11:22] = ORANGE
+HUE_LUT[22:35] = YELLOW
+HUE_LUT[35:86] = GREEN
+HUE_LUT[165:180] = RED
+
+# A blob is one fruit only if it is roughly round: its pixels fill most of its bounding
+# box (a disc fills pi/4) and the box is not elongated. Leaves, stems and fruit fused
+# with foliage fail this.
+MIN_FILL = 0.6
+MAX_ASPECT = 1.6
+
+# =============================
+# Fruit stages (USDA colour chart): share of the surface no longer green
+# =============================
+STAGES = [
+    ("Green", 0.02),       # below this share of colour the fruit is still green
+    ("Breaker", 0.10),
+    ("Turning", 0.30),
+    ("Pink", 0.60),
+    ("Light red", 0.90),
+    ("Red", 1.01),
+]
+STAGE_COLORS = {
+    "Green": (0, 200, 0), "Breaker": (0, 220, 220), "Turning": (0, 165, 255),
+    "Pink": (180, 105, 255), "Light red": (80, 80, 255), "Red": (0, 0, 255),
+}
+
+
+def stage_of(colored_share):
+    for name, upper in STAGES:
+        if colored_share < upper:
+            return name
+    return STAGES[-1][0]
+
+
+class RipenessClassifier:
+    """Ripeness stage of every fruit in a frame from one hue lookup per pixel.
+
+    Pixels are labelled green / yellow / orange / red through HUE_LUT and the labelled
+    pixels form the fruit mask. Blobs are its external contours; each blob's colour
+    histogram is one np.bincount over the labels inside its contour, so only pixels in
+    blob boxes are binned. Frame-sized buffers are reused per frame.
+
+    Only round blobs (MIN_FILL, MAX_ASPECT) count as fruits as they are. A blob that
+    is not round and has no colour is foliage and dropped. One that is not round but
+    has colour is a fruit fused with foliage: it is re-seeded from its yellow/orange/red
+    pixels, and each seed is measured inside the disc its colour spans. That disc can
+    miss green parts of the fruit beyond the colour, so such fruits read riper.
+    """
+
+    def __init__(self, morphology=True):
+        self.morphology = morphology
+        self.shape = None
+        self.reallocations = 0
+
+    def _ensure(self, frame):
+        shape = frame.shape[:2]
+        if shape == self.shape:
+            return
+        h, w = shape
+        self.hsv = np.empty((h, w, 3), np.uint8)
+        self.hue = np.empty((h, w), np.uint8)
+        self.labels = np.empty((h, w), np.uint8)
+        self.gate = np.empty((h, w), np.uint8)
+        self.mask = np.empty((h, w), np.uint8)
+        self.morph = np.empty((h, w), np.uint8)
+        self.shape = shape
+        self.reallocations += 1
+
+    def label(self, frame):
+        """Per-pixel colour class (BACKGROUND..RED). The returned array is reused."""
+        self._ensure(frame)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self.hsv)
+        cv2.extractChannel(self.hsv, 0, dst=self.hue)
+        cv2.LUT(self.hue, HUE_LUT, dst=self.labels)
+        cv2.inRange(self.hsv, GATE_LOW, GATE_HIGH, dst=self.gate)
+        cv2.bitwise_and(self.labels, self.gate, dst=self.labels)
+        return self.labels
+
+    def fruits(self, frame, min_area=MIN_AREA):
+        """List of (x, y, w, h, stage, colored_share, histogram) for every fruit blob.
+
+        histogram holds the pixel count per colour class (index GREEN..RED).
+        """
+        labels = self.label(frame)
+        cv2.threshold(labels, 0, 255, cv2.THRESH_BINARY, dst=self.mask)
+        mask = self.mask
+        if self.morphology:
+            cv2.morphologyEx(self.mask, cv2.MORPH_OPEN, KERNEL, dst=self.morph)
+            cv2.morphologyEx(self.morph, cv2.MORPH_DILATE, KERNEL, dst=self.mask)
+        # Contours (~0.1 ms) instead of connected components (~2 ms) over the frame
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        results = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < min_area:
+                continue
+            # The blob's own mask pixels: its filled contour within the fruit mask
+            inside = np.zeros((h, w), np.uint8)
+            cv2.drawContours(inside, [contour], 0, 255, cv2.FILLED, offset=(-x, -y))
+            cv2.bitwise_and(inside, mask[y:y + h, x:x + w], dst=inside)
+            inside = inside > 0
+            roi = labels[y:y + h, x:x + w]
+            counts = np.bincount(roi[inside], minlength=NUM_LABELS)
+            area = counts.sum()
+            if area < min_area or counts[GREEN:].sum() == 0:
+                continue
+            if area >= MIN_FILL * w * h and max(w, h) <= MAX_ASPECT * min(w, h):
+                results.append(_fruit(x, y, w, h, counts))
+            elif counts[YELLOW:].sum():
+                results.extend(self._reseed(roi, inside, x, y, min_area))
+        return results
+
+    def _reseed(self, roi, inside, x, y, min_area):
+        """Fruits inside a non-round blob, one per yellow/orange/red seed.
+
+        roi is the blob box of the label image, inside its pixels; x, y the box origin.
+        """
+        h, w = roi.shape
+        seeds = ((roi >= YELLOW) & inside).astype(np.uint8)
+        if self.morphology:
+            seeds = cv2.morphologyEx(seeds, cv2.MORPH_OPEN, KERNEL)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(seeds, connectivity=8)
+        rows, cols = np.ogrid[:h, :w]
+        fruits = []
+        for sx, sy, sw, sh, area in stats[1:]:
+            if area < min_area:
+                continue
+            cx, cy, r = sx + sw / 2.0, sy + sh / 2.0, max(sw, sh) / 2.0
+            disc = ((cols - cx) ** 2 + (rows - cy) ** 2 <= r * r) & inside
+            counts = np.bincount(roi[disc], minlength=NUM_LABELS)
+            fx, fy = max(0, int(cx - r)), max(0, int(cy - r))
+            fw, fh = min(w, int(cx + r)) - fx, min(h, int(cy + r)) - fy
+            fruits.append(_fruit(x + fx, y + fy, fw, fh, counts))
+        return fruits
+
+
+def _fruit(x, y, w, h, counts):
+    share = float(counts[YELLOW:].sum()) / counts[GREEN:].sum()
+    return int(x), int(y), int(w), int(h), stage_of(share), share, counts[GREEN:]
+
+
+# =============================
+# ms/frame against the red-only mask (frame_arena.FrameProcessor.boxes)
+# =============================
+def staged_frame(width=640, height=480, foliage=False):
+    """Neutral background with one fruit per stage, each partly green.
+
+    foliage adds a stem across the top, a loose leaf at the bottom and a leaf fused to
+    the red fruit; none of them may show up as a fruit, nor change the red fruit's stage.
+    """
+    frame = np.full((height, width, 3), (90, 90, 90), np.uint8)
+    shares = (0.0, 0.05, 0.2, 0.45, 0.75, 1.0)
+    radius = height // 10
+    leaf = (40, 150, 50)
+    if foliage:
+        cv2.rectangle(frame, (0, height // 3 - radius - 24), (width, height // 3 - radius - 16),
+                      leaf, -1)
+        cv2.ellipse(frame, (width // 2, height - 24), (120, 14), 5, 0, 360, leaf, -1)
+        red = (width * 3 // 4, height * 2 // 3)
+        cv2.ellipse(frame, (red[0] + radius + 40, red[1]), (60, 12), 0, 0, 360, leaf, -1)
+    for i, share in enumerate(shares):
+        center = (width * (i % 3 + 1) // 4, height * (i // 3 + 1) // 3)
+        cv2.circle(frame, center, radius, (40, 170, 60), -1)     # green
+        if share:
+            cv2.ellipse(frame, center, (radius, radius), -90, 0, 360 * share,
+                        (30, 30, 210), -1)                       # red sector
+    return frame
+
+
+if __name__ == "__main__":
+    from frame_arena import FrameProcessor
+
+    frame = staged_frame()
+    classifier = RipenessClassifier()
+    for foliage in (False, True):
+        print("with foliage" if foliage else "neutral background")
+        for x, y, w, h, stage, share, counts in sorted(classifier.fruits(staged_frame(foliage=foliage))):
+            print(f"  fruit at ({x:3d},{y:3d}) {w:3d}x{h:3d}: {stage:9s} {share * 100:5.1f}% coloured")
+
+    def per_frame(step, iterations=200):
+        step()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            step()
+        return (time.perf_counter() - start) / iterations * 1000
+
+    processor = FrameProcessor()
+    red_ms = per_frame(lambda: processor.boxes(frame))
+    stage_ms = per_frame(lambda: classifier.fruits(frame))
+    print(f"ms/frame @640x480: red-only boxes {red_ms:.2f}, six-stage ripeness {stage_ms:.2f}")
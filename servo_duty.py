@@ -0,0 +1,42 @@
+# =============================
+# Angle -> PCA9685 duty_cycle mappings
+# =============================
+# The raw-duty scripts (test_slow_1.py, movement_test.py) write duty_cycle directly
+# instead of going through adafruit_motor.servo. Their mappings live here so they can
+# be shared, benchmarked and driven through joint_state.JointState via DutyServo.
+SERVO_MIN = 500           # us
+SERVO_MAX = 2500          # us
+PERIOD_US = 20000         # 50 Hz
+SAFE_RANGE = (30, 150)    # movement_test.py clamps every angle to this
+
+
+def angle_to_duty(angle):
+    """16-bit duty cycle for angle (0-180) over SERVO_MIN..SERVO_MAX; test_slow_1.py."""
+    pulse = SERVO_MIN + (angle / 180.0) * (SERVO_MAX - SERVO_MIN)
+    return int((pulse / PERIOD_US) * 65535)
+
+
+def safe_angle_to_duty(angle):
+    """movement_test.py mapping: angle clamped to SAFE_RANGE, 4096-step pulse count."""
+    angle = max(SAFE_RANGE[0], min(SAFE_RANGE[1], angle))
+    return int(4096 * (0.5 + angle / 180 * 2.0) / 20)
+
+
+class DutyServo:
+    """Servo-like wrapper over a PCA9685 channel: angle = x writes to_duty(x), None relaxes.
+
+    Lets raw-duty scripts share JointState with the adafruit_motor.servo scripts. The
+    angle is write-only; reads come from JointState, never from the register.
+    """
+
+    def __init__(self, pwm_out, to_duty=angle_to_duty):
+        self._pwm_out = pwm_out
+        self._to_duty = to_duty
+
+    @property
+    def angle(self):
+        raise AttributeError("DutyServo angles are write-only; read them from JointState")
+
+    @angle.setter
+    def angle(self, value):
+        self._pwm_out.duty_cycle = 0 if value is None else self._to_duty(value)
@@ -0,0 +1,101 @@
+# =============================
+# Simulated PCA9685 + servos
+# =============================
+# Drop-in stand-ins for adafruit_pca9685.PCA9685 and adafruit_motor.servo.Servo that
+# count I2C register traffic instead of talking to the bus. Used for benchmarks and
+# for developing motion code away from the arm.
+
+PCA_CHANNELS = 16
+
+
+class SimI2C:
+    """Counts register reads and writes that would have gone over the bus."""
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+
+    def reset(self):
+        self.reads = 0
+        self.writes = 0
+
+
+class SimChannel:
+    def __init__(self, i2c):
+        self._i2c = i2c
+        self._duty = 0
+
+    @property
+    def duty_cycle(self):
+        self._i2c.reads += 1
+        return self._duty
+
+    @duty_cycle.setter
+    def duty_cycle(self, value):
+        if not 0 <= value <= 0xFFFF:
+            raise ValueError("Out of range")
+        self._i2c.writes += 1
+        self._duty = value
+
+
+class SimPCA9685:
+    def __init__(self, i2c=None):
+        self.i2c = i2c if i2c is not None else SimI2C()
+        self.frequency = 50
+        self.channels = [SimChannel(self.i2c) for _ in range(PCA_CHANNELS)]
+
+    def deinit(self):
+        for ch in self.channels:
+            ch._duty = 0
+
+
+class SimServo:
+    """Same angle <-> duty cycle mapping as adafruit_motor.servo.Servo."""
+
+    def __init__(self, pwm_out, actuation_range=180, min_pulse=750, max_pulse=2250,
+                 frequency=50):
+        self._pwm_out = pwm_out
+        self.actuation_range = actuation_range
+        self._min_duty = int((min_pulse * frequency) / 1000000 * 0xFFFF)
+        max_duty = (max_pulse * frequency) / 1000000 * 0xFFFF
+        self._duty_range = int(max_duty - self._min_duty)
+
+    @property
+    def angle(self):
+        duty = self._pwm_out.duty_cycle
+        if duty == 0:
+            return None
+        return self.actuation_range * (duty - self._min_duty) / self._duty_range
+
+    @angle.setter
+    def angle(self, new_angle):
+        if new_angle is None:
+            self._pwm_out.duty_cycle = 0
+            return
+        if new_angle < 0 or new_angle > self.actuation_range:
+            raise ValueError("Angle out of range")
+        fraction = new_angle / self.actuation_range
+        self._pwm_out.duty_cycle = self._min_duty + int(fraction * self._duty_range)
+
+
+class SimClock:
+    """Virtual time: sleep() advances instantly, so long motion sequences replay in ms."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def monotonic(self):
+        return self.now
+
+
+def make_servos(channels, min_pulse=500, max_pulse=2500):
+    """Simulated (pca, servos dict) wired like detect_pick.py."""
+    pca = SimPCA9685()
+    servos = {ch: SimServo(pca.channels[ch], min_pulse=min_pulse, max_pulse=max_pulse)
+              for ch in channels}
+    return pca, servos
+
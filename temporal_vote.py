@@ -0,0 +1,267 @@
+import math
+
+from pick_scheduler import MATCH_RADIUS
+
+# =============================
+# Sequential probability ratio test per fruit
+# =============================
+# Each classified frame contributes the logit log(p / (1 - p)) of its healthy
+# probability. Frames of one fruit are correlated: the model's logit is a per-fruit bias
+# (lighting, angle, the fruit itself) plus per-frame noise. With class means +/-LOGIT_MEAN,
+# bias spread FRUIT_SPREAD and frame noise FRAME_NOISE, the log-likelihood ratio of n
+# frames with logit sum S is
+#
+#     evidence = 2 * LOGIT_MEAN * S / (n * FRUIT_SPREAD^2 + FRAME_NOISE^2)
+#
+# so one very confident frame can decide a fruit, while repeated frames of a fruit the
+# model is unsure about saturate instead of adding up. Fit the three constants on
+# labelled tracks with calibrate(). The fruit is picked when evidence reaches ACCEPT,
+# rejected at REJECT, and left undecided (no pick) after MAX_FRAMES.
+#
+# Wald's bounds ln((1-beta)/alpha) = 3.81 and ln(beta/(1-alpha)) = -2.28 ignore the
+# truncation at MAX_FRAMES and overshoot; ACCEPT/REJECT/MAX_FRAMES were instead swept
+# with evaluate() (20000 fruits) for the fewest frames meeting alpha and beta.
+FALSE_PICK_RATE = 0.02     # alpha: unhealthy fruit picked
+MISSED_PICK_RATE = 0.10    # beta: healthy fruit not picked (rejected or undecided)
+LOGIT_MEAN = 1.0           # mean model logit of healthy fruit (unhealthy: -LOGIT_MEAN)
+FRUIT_SPREAD = 0.5         # std of a fruit's mean logit around its class mean
+FRAME_NOISE = 1.2          # std of one frame's logit around its fruit's mean
+LOGIT_CLIP = 6.0           # a saturated softmax counts as this logit at most
+ACCEPT = 3.3
+REJECT = -3.25
+MAX_FRAMES = 40            # still between the thresholds after this many: undecided, no pick
+MAX_MISSES = 5             # frames a track may go unseen before it is dropped
+# The only pick gate: a fruit is picked iff its evidence reached ACCEPT, i.e. its
+# confidence (posterior of healthy at even odds) is at least this
+PICK_CONFIDENCE = 1.0 / (1.0 + math.exp(-ACCEPT))
+
+
+def frame_logit(p_healthy):
+    p = min(max(p_healthy, 1e-6), 1 - 1e-6)
+    return max(-LOGIT_CLIP, min(LOGIT_CLIP, math.log(p / (1 - p))))
+
+
+def evidence(logit_sum, frames):
+    """Log-likelihood ratio healthy vs unhealthy of frames with this logit sum."""
+    return 2.0 * LOGIT_MEAN * logit_sum / (frames * FRUIT_SPREAD ** 2 + FRAME_NOISE ** 2)
+
+
+def calibrate(healthy_tracks, unhealthy_tracks):
+    """(LOGIT_MEAN, FRUIT_SPREAD, FRAME_NOISE) from per-fruit lists of healthy
+    probabilities, e.g. dataset_capture.py predictions grouped by fruit and labelled."""
+    means, within = [], []
+    for sign, tracks in ((1.0, healthy_tracks), (-1.0, unhealthy_tracks)):
+        for track in tracks:
+            logits = [frame_logit(p) for p in track]
+            mean = sum(logits) / len(logits)
+            means.append(sign * mean)
+            within.extend((l - mean) ** 2 for l in logits)
+    mu = sum(means) / len(means)
+    frame_var = sum(within) / max(1, len(within) - len(means))
+    spread_var = sum((m - mu) ** 2 for m in means) / max(1, len(means) - 1)
+    return mu, math.sqrt(spread_var), math.sqrt(frame_var)
+
+
+class Track:
+    __slots__ = ("id", "box", "logit_sum", "evidence", "frames", "decision", "finished",
+                 "misses")
+
+    def __init__(self, track_id, box):
+        self.id = track_id
+        self.box = box
+        self.logit_sum = 0.0
+        self.evidence = 0.0
+        self.frames = 0
+        self.decision = None     # None undecided, True healthy, False unhealthy
+        self.finished = False    # no more frames wanted: decided, or undecided at MAX_FRAMES
+        self.misses = 0
+
+    @property
+    def confidence(self):
+        """Posterior probability of the current decision (healthy when undecided)."""
+        p = 1.0 / (1.0 + math.exp(-self.evidence))
+        return 1.0 - p if self.decision is False else p
+
+
+class SequentialVoter:
+    """Follows fruits across frames and decides each one as soon as its evidence suffices.
+
+    Per frame: update(boxes) matches boxes to tracks, then observe(track, p) for every
+    track not yet finished. Finished tracks need no more inference; only those with
+    decision True are picked.
+    """
+
+    def __init__(self, match_radius=MATCH_RADIUS):
+        self.match_radius = match_radius
+        self.tracks = []
+        self._next_id = 0
+        self.inferences = 0
+        self.decided = 0
+        self.undecided = 0
+        self.decision_frames = 0
+
+    def update(self, boxes):
+        """Matches boxes to tracks by centre distance; returns the tracks seen this frame."""
+        unmatched = list(self.tracks)
+        seen = []
+        for box in boxes:
+            cx, cy = box[0] + box[2] / 2.0, box[1] + box[3] / 2.0
+            best, best_dist = None, self.match_radius
+            for track in unmatched:
+                x, y, w, h = track.box
+                dist = math.hypot(x + w / 2.0 - cx, y + h / 2.0 - cy)
+                if dist <= best_dist:
+                    best, best_dist = track, dist
+            if best is None:
+                best = Track(self._next_id, box)
+                self._next_id += 1
+                self.tracks.append(best)
+            else:
+                unmatched.remove(best)
+            best.box = box
+            best.misses = 0
+            seen.append(best)
+        for track in unmatched:
+            track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= MAX_MISSES]
+        return seen
+
+    def observe(self, track, p_healthy):
+        """Adds one classified frame of track; returns its decision (None if undecided)."""
+        if track.finished:
+            return track.decision
+        self.inferences += 1
+        track.frames += 1
+        track.logit_sum += frame_logit(p_healthy)
+        track.evidence = evidence(track.logit_sum, track.frames)
+        if track.evidence >= ACCEPT:
+            track.decision = True
+        elif track.evidence <= REJECT:
+            track.decision = False
+        elif track.frames >= MAX_FRAMES:
+            track.finished = True
+            self.undecided += 1
+        if track.decision is not None:
+            track.finished = True
+            self.decided += 1
+            self.decision_frames += track.frames
+        return track.decision
+
+    def track_at(self, box):
+        """The track whose box is nearest box (within match_radius), or None."""
+        cx, cy = box[0] + box[2] / 2.0, box[1] + box[3] / 2.0
+        best, best_dist = None, self.match_radius
+        for track in self.tracks:
+            x, y, w, h = track.box
+            dist = math.hypot(x + w / 2.0 - cx, y + h / 2.0 - cy)
+            if dist <= best_dist:
+                best, best_dist = track, dist
+        return best
+
+    def forget(self, track):
+        if track in self.tracks:
+            self.tracks.remove(track)
+
+    @property
+    def mean_frames_to_decision(self):
+        return self.decision_frames / self.decided if self.decided else 0.0
+
+
+# =============================
+# Decision latency and inference count on synthetic prediction streams
+# =============================
+MIN_CONFIDENCE = 0.60      # the old detect_pick.py single-frame rule
+
+
+def _stream(rng, healthy):
+    """Per-frame healthy probabilities of one fruit: a per-fruit bias (lighting, angle)
+    plus per-frame noise, so frames of the same fruit are correlated."""
+    bias = rng.gauss(1.0 if healthy else -1.0, 0.5)
+    while True:
+        logit = bias + rng.gauss(0.0, 1.2)
+        yield 1.0 / (1.0 + math.exp(-logit))
+
+
+def _single_frame(stream):
+    return next(stream) >= MIN_CONFIDENCE, 1, 1
+
+
+def _n_in_a_row(stream, n=3):
+    frames = 0
+    for frames in range(1, n + 1):
+        if next(stream) < MIN_CONFIDENCE:
+            return False, frames, frames
+    return True, frames, frames
+
+
+def _vote_threshold(n):
+    """Logit-sum threshold of an n-frame vote picking FALSE_PICK_RATE of unhealthy fruit,
+    and the healthy fraction it then misses (normal model, clip ignored)."""
+    from statistics import NormalDist
+
+    sd = math.sqrt(n * n * FRUIT_SPREAD ** 2 + n * FRAME_NOISE ** 2)
+    threshold = -n * LOGIT_MEAN + NormalDist().inv_cdf(1 - FALSE_PICK_RATE) * sd
+    return threshold, NormalDist(n * LOGIT_MEAN, sd).cdf(threshold)
+
+
+def vote_frames(limit=MAX_FRAMES):
+    """Fewest frames a fixed vote needs to meet both FALSE_PICK_RATE and MISSED_PICK_RATE."""
+    for n in range(1, limit + 1):
+        if _vote_threshold(n)[1] <= MISSED_PICK_RATE:
+            return n
+    return limit
+
+
+def _fixed_vote(stream, n=8):
+    threshold = _vote_threshold(n)[0]
+    logit_sum = sum(frame_logit(next(stream)) for _ in range(n))
+    return logit_sum > threshold, n, n
+
+
+def _sprt(stream):
+    """Picks only on an ACCEPT decision; undecided fruits are not picked."""
+    voter = SequentialVoter()
+    track = voter.update([(0, 0, 10, 10)])[0]
+    while not track.finished:
+        voter.observe(track, next(stream))
+    return track.decision is True, track.frames, voter.inferences
+
+
+def evaluate(fruits=5000, healthy_ratio=0.7, seed=0):
+    import random
+
+    import functools
+
+    matched = vote_frames()
+    rows = []
+    for name, policy in (("single frame", _single_frame), ("3 in a row", _n_in_a_row),
+                         ("8-frame vote", _fixed_vote),
+                         (f"{matched}-frame vote", functools.partial(_fixed_vote, n=matched)),
+                         ("SPRT", _sprt)):
+        rng = random.Random(seed)
+        frames = inferences = false_picks = missed = unhealthy = healthy_total = 0
+        for _ in range(fruits):
+            healthy = rng.random() < healthy_ratio
+            decision, n_frames, n_inferences = policy(_stream(rng, healthy))
+            frames += n_frames
+            inferences += n_inferences
+            if healthy:
+                healthy_total += 1
+                missed += not decision
+            else:
+                unhealthy += 1
+                false_picks += decision
+        rows.append((name, frames / fruits, inferences / fruits,
+                     false_picks / max(1, unhealthy), missed / max(1, healthy_total)))
+    return rows
+
+
+if __name__ == "__main__":
+    print(f"SPRT thresholds: accept {ACCEPT:.2f}, reject {REJECT:.2f} "
+          f"(alpha {FALSE_PICK_RATE}, beta {MISSED_PICK_RATE})")
+    print(f"fixed votes use the logit-sum threshold for {FALSE_PICK_RATE:.0%} false picks; "
+          f"{vote_frames()} frames are needed for {MISSED_PICK_RATE:.0%} missed")
+    print("policy         frames  inferences  false picks  missed healthy")
+    for name, frames, inferences, false_picks, missed in evaluate():
+        print(f"{name:13s}  {frames:6.2f}  {inferences:10.2f}  {false_picks * 100:10.1f}%  "
+              f"{missed * 100:13.1f}%")
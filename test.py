@@ -3,6 +3,8 @@ import board
 import busio
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
+from joint_state import JointState
+from motion_recorder import MotionRecorder, load_waypoints, play
 
 # ----------------------------
 # PARAMETERS
@@ -11,6 +13,7 @@ SERVO_CHANNELS = 6         # Total servos in your arm
 MIN_PULSE = 500            # Standard min pulse (usually 500-750)
 MAX_PULSE = 2500           # Standard max pulse (usually 2250-2500)
 MAX_ANGLE = 180            # Adjusted to standard 180 degrees
+RECORDING_PATH = "pick_sequence.tmrc"
 
 # ----------------------------
 # INITIALIZATION
@@ -27,6 +30,14 @@ for i in range(SERVO_CHANNELS):
     servos.append(servo.Servo(pca.channels[i], actuation_range=MAX_ANGLE, 
                               min_pulse=MIN_PULSE, max_pulse=MAX_PULSE))
 
+# Every command goes through the shared joint state, so other scripts start from here
+joints = JointState(servos)
+
+# Tracks every commanded angle so manual mode can store waypoints
+# Seeded from the shared pose: joints not moved while teaching are recorded where they
+# are instead of as unknown
+recorder = MotionRecorder(range(SERVO_CHANNELS), joints.pose)
+
 # ----------------------------
 # FUNCTIONS
 # ----------------------------
@@ -35,23 +46,52 @@ def move_servo(channel, angle):
     """Moves a specific servo to the desired angle."""
     if 0 <= angle <= MAX_ANGLE:
         print(f"Moving servo on channel {channel} to {angle} degrees")
-        servos[channel].angle = angle
+        joints.command(channel, angle)
+        joints.save()
+        recorder.update(channel, angle)
     else:
         print(f"Error: Angle {angle} is out of range (0-{MAX_ANGLE})")
 
 def manual_control(channel):
     print(f"\n--- Manual Control: Channel {channel} ---")
-    print('Enter angle (0-180) or "x" to return to main menu.')
+    print('Enter angle (0-180), "w" to record a waypoint or "x" to return to main menu.')
     while True:
         choice = input("Angle: ")
         if choice.lower() == 'x':
             break
+        if choice.lower() == 'w':
+            print(f"Waypoint {recorder.mark()} recorded: {recorder.pose}")
+            continue
         try:
             angle = int(choice)
             move_servo(channel, angle)
         except ValueError:
             print("Invalid input. Please enter a number.")
 
+def save_recording():
+    if not recorder.waypoints:
+        print("No waypoints recorded yet.")
+        return
+    recorder.save(RECORDING_PATH)
+    print(f"Saved {len(recorder.waypoints)} waypoints to {RECORDING_PATH}")
+
+def replay_recording():
+    try:
+        _, waypoints = load_waypoints(RECORDING_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Cannot load {RECORDING_PATH}: {e}")
+        return
+    if not waypoints:
+        print(f"{RECORDING_PATH} has no waypoints.")
+        return
+    print(f"Replaying {len(waypoints)} waypoints from {RECORDING_PATH}")
+    poses = [pose for _, pose in waypoints]
+    duration = play(poses, joints.tracked(), current=joints.pose)
+    joints.save()
+    for ch, angle in poses[-1].items():
+        recorder.update(ch, angle)
+    print(f"Replay complete in {duration:.1f} s.")
+
 def automatic_test(channel):
     print(f"\n--- Running Auto Test on Channel {channel} ---")
     test_angles = [0, 90, 180, 90, 0]
@@ -70,9 +110,16 @@ if __name__ == "__main__":
             print("6-AXIS ROBOTIC ARM CONTROLLER")
             print("="*30)
             
-            chan_input = input(f"Which channel (0-{SERVO_CHANNELS-1})? (or 'q' to quit): ")
+            chan_input = input(f"Which channel (0-{SERVO_CHANNELS-1})? "
+                               "('s' save waypoints, 'p' replay recording, 'q' quit): ")
             if chan_input.lower() == 'q':
                 break
+            if chan_input.lower() == 's':
+                save_recording()
+                continue
+            if chan_input.lower() == 'p':
+                replay_recording()
+                continue
                 
             try:
                 channel = int(chan_input)
@@ -2,6 +2,8 @@ import time
 from adafruit_pca9685 import PCA9685
 from board import SCL, SDA
 import busio
+from joint_state import JointState
+from servo_duty import DutyServo
 
 # ==============================
 # PCA9685 SETUP
@@ -22,29 +24,21 @@ GRIPPER = 5
 # ==============================
 # SERVO LIMITS (SAFE)
 # ==============================
-SERVO_MIN = 500
-SERVO_MAX = 2500
-
-def angle_to_duty(angle):
-    pulse = SERVO_MIN + (angle / 180.0) * (SERVO_MAX - SERVO_MIN)
-    return int((pulse / 20000) * 65535)
+# 500-2500 us pulse range, see servo_duty.angle_to_duty
+# Commands go through the shared joint state so the next script knows the pose
+joints = JointState({ch: DutyServo(pca.channels[ch]) for ch in (BASE, SHOULDER, ELBOW, PITCH, GRIPPER)})
 
 def set_angle(ch, angle):
     angle = max(0, min(180, angle))
-    pca.channels[ch].duty_cycle = angle_to_duty(angle)
+    joints.command(ch, angle)
 
 # ==============================
 # SLOW SINGLE-SERVO MOVE
 # ==============================
-def slow_move(ch, start, end, step=1, delay=0.03):
-    if start < end:
-        for a in range(start, end + 1, step):
-            set_angle(ch, a)
-            time.sleep(delay)
-    else:
-        for a in range(start, end - 1, -step):
-            set_angle(ch, a)
-            time.sleep(delay)
+# Sweeps from wherever the joint actually is (shadowed and persisted by JointState),
+# not from an assumed start angle
+def slow_move(ch, end, delay=0.03):
+    joints.move_slow(ch, end, delay)
 
 # ==============================
 # HOME POSITION
@@ -53,18 +47,19 @@ def home():
     print("Moving to HOME")
 
     set_angle(PITCH, 90)
+    joints.save()
     time.sleep(0.5)
 
-    slow_move(GRIPPER, 180, 0)
+    slow_move(GRIPPER, 0)
     time.sleep(0.5)
 
-    slow_move(ELBOW, 100, 65)
+    slow_move(ELBOW, 65)
     time.sleep(0.5)
 
-    slow_move(SHOULDER, 115, 130)
+    slow_move(SHOULDER, 130)
     time.sleep(0.5)
 
-    slow_move(BASE, 90, 0)
+    slow_move(BASE, 0)
     time.sleep(0.5)
 
 # ==============================
@@ -74,19 +69,19 @@ def pick():
     print("Picking tomato")
 
     # 1. Open gripper
-    slow_move(GRIPPER, 0, 180)
+    slow_move(GRIPPER, 180)
     time.sleep(0.5)
 
     # 2. Shoulder moves down
-    slow_move(SHOULDER, 130, 115)
+    slow_move(SHOULDER, 115)
     time.sleep(0.5)
 
     # 3. Elbow moves forward
-    slow_move(ELBOW, 65, 100)
+    slow_move(ELBOW, 100)
     time.sleep(0.5)
 
     # 4. Close gripper
-    slow_move(GRIPPER, 180, 0)
+    slow_move(GRIPPER, 0)
     time.sleep(0.5)
 
 # ==============================
@@ -96,18 +91,18 @@ def drop():
     print("Dropping tomato")
 
     # 1. Lift arm
-    slow_move(ELBOW, 100, 65)
+    slow_move(ELBOW, 65)
     time.sleep(0.5)
 
-    slow_move(SHOULDER, 115, 130)
+    slow_move(SHOULDER, 130)
     time.sleep(0.5)
 
     # 2. Rotate to cart
-    slow_move(BASE, 0, 90)
+    slow_move(BASE, 90)
     time.sleep(0.5)
 
     # 3. Release
-    slow_move(GRIPPER, 0, 180)
+    slow_move(GRIPPER, 180)
     time.sleep(0.5)
 
 # ==============================
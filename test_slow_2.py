@@ -3,6 +3,7 @@ import board
 import busio
 from adafruit_pca9685 import PCA9685
 from adafruit_motor import servo
+from joint_state import JointState
 
 # =============================
 # INITIALIZATION
@@ -35,24 +36,13 @@ LIMITS = {
     GRIPPER_CH:  {"open": 170,    "close": 20}
 }
 
-def move_slow(channel_id, target_angle, speed=0.04):
-    current = servos[channel_id].angle
-    if current is None:
-        current = 90 # Default starting assumption
-    
-    start_angle = int(current)
-    target_angle = int(target_angle)
-    
-    # Simple safety clamp
-    target_angle = max(0, min(180, target_angle))
+# Shadow of every commanded angle, persisted to joint_state.json between runs, so the
+# start angle is known without an I2C read and without assuming 90 after a restart
+joints = JointState(servos)
 
-    if start_angle == target_angle:
-        return
-
-    step = 1 if target_angle > start_angle else -1
-    for angle in range(start_angle, target_angle + step, step):
-        servos[channel_id].angle = angle
-        time.sleep(speed)
+def move_slow(channel_id, target_angle, speed=0.04):
+    # Steps from the shadowed angle; clamps the target to 0-180
+    joints.move_slow(channel_id, target_angle, speed)
 
 # =============================
 # MOVEMENT SEQUENCES
@@ -77,7 +67,7 @@ def pick_tomato():
     # We move to 'close' limit. 
     move_slow(GRIPPER_CH, LIMITS[GRIPPER_CH]["close"], speed=0.02)
     time.sleep(1)
-    servos[GRIPPER_CH].angle = None 
+    joints.relax(GRIPPER_CH)
     print("Motor relaxed to prevent overheating.")
 
 def drop_tomato():
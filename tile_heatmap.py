@@ -0,0 +1,238 @@
+import time
+
+import cv2
+import numpy as np
+
+from frame_arena import LOWER_RED1, LOWER_RED2, UPPER_RED1, UPPER_RED2
+
+MODEL_PATH = "tomato_model_pi.tflite"
+
+# =============================
+# Tiling defaults
+# =============================
+TILE_SIZE = 224          # tile edge in frame pixels, resized to the model input
+OVERLAP = 0.5            # share of a tile shared with its neighbour
+BATCH_SIZE = 8           # tiles per invoke()
+MIN_FRUIT_SHARE = 0.05   # tiles with less red/green fruit than this are skipped
+HEAT_CELL = 8            # heatmap resolution: one cell per 8x8 frame pixels
+MASK_SCALE = 0.25        # fruit mask is computed at quarter resolution
+
+LOWER_GREEN = np.array([35, 80, 50], np.uint8)
+UPPER_GREEN = np.array([85, 255, 255], np.uint8)
+
+
+def tile_grid(height, width, tile=TILE_SIZE, overlap=OVERLAP):
+    """(x, y) of overlapping tiles covering the frame; the last row/column sits flush with the edge."""
+    tile = min(tile, height, width)
+    stride = max(1, int(tile * (1.0 - overlap)))
+
+    def starts(length):
+        positions = list(range(0, length - tile + 1, stride))
+        if positions[-1] != length - tile:
+            positions.append(length - tile)
+        return positions
+
+    return [(x, y) for y in starts(height) for x in starts(width)]
+
+
+# =============================
+# Batched interpreter
+# =============================
+class BatchedClassifier:
+    """One interpreter taking up to batch_size tiles per invoke, so N tiles cost
+    ceil(N / batch) invokes.
+
+    Crops are resized straight into the uint8 batch buffer and converted to float once
+    per batch. A short last batch is invoked at its real size (the input is resized when
+    the size changes), not padded: every padded row would cost a full inference.
+    Same classify()/close() shape as InterpreterPool.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, batch_size=BATCH_SIZE, num_threads=4):
+        # Imported here so the tiling and heatmap code runs without a TFLite runtime
+        from interpreter_pool import load_interpreter
+
+        self.batch_size = batch_size
+        self.interpreter = load_interpreter(model_path, num_threads)
+        inp = self.interpreter.get_input_details()[0]
+        self.input_index = inp["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self.dtype = inp["dtype"]
+        _, self.height, self.width, _ = (int(d) for d in inp["shape"])
+        self.invoke_size = 1
+        self.resized = np.zeros((batch_size, self.height, self.width, 3), np.uint8)
+        self.model_input = np.zeros((batch_size, self.height, self.width, 3), self.dtype)
+        self.invokes = 0
+
+    def _set_invoke_size(self, size):
+        # resize+allocate is ~0.1 ms and only happens when the chunk size changes
+        if size == self.invoke_size:
+            return
+        self.interpreter.resize_tensor_input(self.input_index, [size, self.height, self.width, 3])
+        self.interpreter.allocate_tensors()
+        self.invoke_size = size
+
+    def classify(self, crops):
+        """Predictions for crops, in input order."""
+        results = []
+        for start in range(0, len(crops), self.batch_size):
+            chunk = crops[start:start + self.batch_size]
+            size = len(chunk)
+            self._set_invoke_size(size)
+            for k, crop in enumerate(chunk):
+                cv2.resize(crop, (self.width, self.height), dst=self.resized[k])
+            model_input = self.model_input[:size]
+            if self.dtype == np.float32:
+                np.copyto(model_input, self.resized[:size])
+                model_input *= np.float32(1.0 / 255.0)
+            else:
+                model_input[...] = self.resized[:size]
+            self.interpreter.set_tensor(self.input_index, model_input)
+            self.interpreter.invoke()
+            self.invokes += 1
+            results.extend(self.interpreter.get_tensor(self.output_index))
+        return results
+
+    def close(self):
+        self.interpreter = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =============================
+# Tiled heatmap
+# =============================
+class TileHeatmap:
+    """Classifies overlapping tiles of a frame and averages them into per-class heatmaps.
+
+    analyze() returns (tiles, heatmap): tiles is a list of (x, y, size, prediction),
+    heatmap is (num_classes, H / HEAT_CELL, W / HEAT_CELL) float32 holding, per cell,
+    the mean prediction of every tile covering it (0 where no tile was classified).
+    The arrays are reused on the next call.
+    """
+
+    def __init__(self, classifier, tile=TILE_SIZE, overlap=OVERLAP, fruit_only=True,
+                 min_fruit_share=MIN_FRUIT_SHARE):
+        self.classifier = classifier
+        self.tile = tile
+        self.overlap = overlap
+        self.fruit_only = fruit_only
+        self.min_fruit_share = min_fruit_share
+        self.shape = None
+        self.grid = []
+        self.heat = None
+        self.counts = None
+        self._small = self._hsv = self._mask = self._green = None
+        self.tiles_classified = 0
+
+    def _ensure(self, frame):
+        shape = frame.shape[:2]
+        if shape == self.shape:
+            return
+        h, w = shape
+        self.grid = tile_grid(h, w, self.tile, self.overlap)
+        self.cells = (-(-h // HEAT_CELL), -(-w // HEAT_CELL))
+        self.counts = np.zeros(self.cells, np.float32)
+        sh, sw = max(1, int(h * MASK_SCALE)), max(1, int(w * MASK_SCALE))
+        self._small = np.empty((sh, sw, 3), np.uint8)
+        self._hsv = np.empty((sh, sw, 3), np.uint8)
+        self._mask = np.empty((sh, sw), np.uint8)
+        self._green = np.empty((sh, sw), np.uint8)
+        self.heat = None
+        self.shape = shape
+
+    def fruit_mask(self, frame):
+        """Red or green fruit pixels at MASK_SCALE resolution (255 = fruit)."""
+        cv2.resize(frame, (self._small.shape[1], self._small.shape[0]), dst=self._small,
+                   interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2HSV, dst=self._hsv)
+        cv2.inRange(self._hsv, LOWER_RED1, UPPER_RED1, dst=self._mask)
+        cv2.inRange(self._hsv, LOWER_RED2, UPPER_RED2, dst=self._green)
+        cv2.bitwise_or(self._mask, self._green, dst=self._mask)
+        cv2.inRange(self._hsv, LOWER_GREEN, UPPER_GREEN, dst=self._green)
+        cv2.bitwise_or(self._mask, self._green, dst=self._mask)
+        return self._mask
+
+    def select(self, frame):
+        """Tile positions worth classifying: all of them, or those overlapping fruit."""
+        if not self.fruit_only:
+            return self.grid
+        # Integral image: fruit pixels inside any tile in four lookups
+        integral = cv2.integral(self.fruit_mask(frame), sdepth=cv2.CV_32S)
+        size = max(1, int(min(self.tile, *self.shape) * MASK_SCALE))
+        needed = self.min_fruit_share * size * size * 255
+        selected = []
+        for x, y in self.grid:
+            sx, sy = int(x * MASK_SCALE), int(y * MASK_SCALE)
+            total = (integral[sy + size, sx + size] - integral[sy, sx + size]
+                     - integral[sy + size, sx] + integral[sy, sx])
+            if total >= needed:
+                selected.append((x, y))
+        return selected
+
+    def analyze(self, frame):
+        self._ensure(frame)
+        size = min(self.tile, *self.shape)
+        positions = self.select(frame)
+        preds = self.classifier.classify([frame[y:y + size, x:x + size] for x, y in positions])
+        self.tiles_classified += len(positions)
+
+        if self.heat is None and preds:
+            self.heat = np.zeros((len(preds[0]),) + self.cells, np.float32)
+        if self.heat is not None:
+            self.heat.fill(0.0)
+            self.counts.fill(0.0)
+            for (x, y), pred in zip(positions, preds):
+                cx0, cy0 = x // HEAT_CELL, y // HEAT_CELL
+                cx1, cy1 = -(-(x + size) // HEAT_CELL), -(-(y + size) // HEAT_CELL)
+                self.heat[:, cy0:cy1, cx0:cx1] += pred[:, None, None]
+                self.counts[cy0:cy1, cx0:cx1] += 1.0
+            np.divide(self.heat, np.maximum(self.counts, 1.0), out=self.heat)
+        tiles = [(x, y, size, pred) for (x, y), pred in zip(positions, preds)]
+        return tiles, self.heat
+
+
+def overlay(frame, heat, alpha=0.4):
+    """Blends a single-class heatmap (values 0..1, any resolution) over frame in place."""
+    h, w = frame.shape[:2]
+    scaled = cv2.resize(np.clip(heat * 255.0, 0, 255).astype(np.uint8), (w, h),
+                        interpolation=cv2.INTER_LINEAR)
+    colored = cv2.applyColorMap(scaled, cv2.COLORMAP_JET)
+    covered = scaled > 0
+    frame[covered] = cv2.addWeighted(frame, 1.0 - alpha, colored, alpha, 0)[covered]
+    return frame
+
+
+# =============================
+# Throughput sweep: tile size x batch size
+# =============================
+def benchmark(model_path=MODEL_PATH, tile_sizes=(160, 224, 320), batch_sizes=(1, 4, 8, 16),
+              frames=20, num_threads=4):
+    from frame_arena import synthetic_frame
+    frame = synthetic_frame(640, 480, num_fruits=3)
+    results = []
+    for batch in batch_sizes:
+        with BatchedClassifier(model_path, batch, num_threads) as classifier:
+            for tile in tile_sizes:
+                for fruit_only in (False, True):
+                    tiler = TileHeatmap(classifier, tile, fruit_only=fruit_only)
+                    tiler.analyze(frame)
+                    tiler.tiles_classified = 0
+                    start = time.perf_counter()
+                    for _ in range(frames):
+                        tiler.analyze(frame)
+                    elapsed = time.perf_counter() - start
+                    results.append((tile, batch, fruit_only, tiler.tiles_classified // frames,
+                                    tiler.tiles_classified / elapsed, 1000 * elapsed / frames))
+    return results
+
+
+if __name__ == "__main__":
+    print(" tile  batch  tiles       tiles/frame  tiles/s  ms/frame")
+    for tile, batch, fruit_only, count, rate, ms in benchmark():
+        which = "fruit only" if fruit_only else "all"
+        print(f"{tile:5d}  {batch:5d}  {which:10s}  {count:11d}  {rate:7.1f}  {ms:8.1f}")